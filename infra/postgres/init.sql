@@ -33,6 +33,26 @@ CREATE TABLE market_candles (
   UNIQUE(market_id, interval, timestamp)
 );
 CREATE INDEX idx_candles_market_time ON market_candles(market_id, timestamp DESC);
+-- Latest 1m close per market (get_latest_price) as an index-only scan
+CREATE INDEX market_candles_latest_idx ON market_candles(market_id, timestamp DESC) INCLUDE (close)
+  WHERE interval = '1m';
+
+-- Running aggregates of the still open higher-timeframe buckets (15m, 1h, 4h),
+-- folded one 1m candle at a time and moved into market_candles once complete
+CREATE TABLE market_candles_wip (
+  market_id UUID NOT NULL REFERENCES markets(id) ON DELETE CASCADE,
+  interval VARCHAR(10) NOT NULL,
+  bucket_start TIMESTAMPTZ NOT NULL,
+  bucket_minutes INTEGER NOT NULL,
+  open DECIMAL(18,8) NOT NULL,
+  high DECIMAL(18,8) NOT NULL,
+  low DECIMAL(18,8) NOT NULL,
+  close DECIMAL(18,8) NOT NULL,
+  volume DECIMAL(18,8) NOT NULL,
+  candle_count INTEGER NOT NULL,
+  last_timestamp TIMESTAMPTZ NOT NULL,  -- latest 1m candle folded in
+  PRIMARY KEY (market_id, interval, bucket_start)
+);
 
 -- Paper accounts
 CREATE TABLE accounts (
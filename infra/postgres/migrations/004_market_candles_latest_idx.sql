@@ -0,0 +1,9 @@
+-- Migration: Covering index for latest 1m price lookups
+-- Run this on existing databases to update the schema
+-- (CONCURRENTLY cannot run inside a transaction block, so no BEGIN/COMMIT)
+
+-- get_latest_price reads the newest 1m close per market: an index-only scan
+-- of one entry instead of sorting the market's candles
+CREATE INDEX CONCURRENTLY IF NOT EXISTS market_candles_latest_idx
+    ON market_candles (market_id, timestamp DESC) INCLUDE (close)
+    WHERE interval = '1m';
@@ -1,14 +1,19 @@
 # Backtest module
-from .runner import run_backtest, save_backtest_result, BacktestEngine, BacktestResult, BacktestTrade
+from .runner import run_backtest, run_backtest_on_candles, save_backtest_result, format_backtest_report, BacktestEngine, BacktestResult, BacktestTrade, CANDLE_DTYPE, candles_to_array, candle_window
 from .monte_carlo import run_monte_carlo, run_monte_carlo_from_equity_curve, MonteCarloResult
 from .walk_forward import run_walk_forward, WalkForwardResult
 
 __all__ = [
     "run_backtest",
+    "run_backtest_on_candles",
     "save_backtest_result",
+    "format_backtest_report",
     "BacktestEngine",
     "BacktestResult",
     "BacktestTrade",
+    "CANDLE_DTYPE",
+    "candles_to_array",
+    "candle_window",
     "run_monte_carlo",
     "run_monte_carlo_from_equity_curve",
     "MonteCarloResult",
@@ -0,0 +1,33 @@
+"""
+Ahead-of-time build of the backtest kernels.
+
+Compiles the Numba kernels in backtest.kernels into a native extension
+(backtest/_bt_kernels*.so), so processes that run backtests skip the JIT
+warmup entirely:
+
+    cd packages/engine/src && python -m backtest._kernels_aot
+
+kernels.py uses the extension when it is present and falls back to the
+cached JIT otherwise. Numba and a C compiler are only needed at build time.
+Rebuild after changing a kernel or its signature.
+"""
+import os
+
+from numba.pycc import CC
+
+from backtest.kernels import simulate, _return_stats_kernel
+
+cc = CC("_bt_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export(
+    "simulate",
+    "Tuple((f8[:], i8[:], i8[:], f8[:], f8[:], f8[:], f8, f8, f8))"
+    "(f8[:], f8[:], b1[:], b1[:], f8, f8, f8, f8, f8, f8, f8, f8)"
+)(simulate.py_func)
+
+cc.export("return_stats", "Tuple((i8, f8, f8))(f8[:])")(_return_stats_kernel.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
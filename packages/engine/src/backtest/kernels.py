@@ -0,0 +1,194 @@
+"""
+Compiled backtest kernels.
+
+Batch counterpart of BacktestEngine.on_data for strategies that can express
+their entries and exits as precomputed boolean masks (Strategy.precompute).
+Runs as a Numba-compiled scalar loop when Numba is installed, and as plain
+Python otherwise. When the ahead-of-time build (backtest._kernels_aot) has
+been run, the precompiled extension is used instead and no JIT warmup is paid.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def simulate(
+    close: np.ndarray,
+    high: np.ndarray,
+    buy_mask: np.ndarray,
+    sell_mask: np.ndarray,
+    fee_rate: float,
+    buy_slip_mul: float,
+    sell_slip_mul: float,
+    cap_usd: float,
+    initial_capital: float,
+    take_profit_pct: float,
+    stop_loss_pct: float,
+    trailing_stop_pct: float,
+):
+    """
+    Simulate a long-only strategy over precomputed entry/exit masks.
+    
+    Mirrors BacktestEngine: fills at close with slippage, cost plus fee sized
+    to min(capital, cap_usd), fees on both legs, equity marked to close and
+    drawdown tracked on it every bar. Besides sell_mask, an open position is
+    closed once its return from the entry fill reaches take_profit_pct or
+    falls to -stop_loss_pct, or its close drops trailing_stop_pct below the
+    highest high since entry (the path-dependent exits a static mask cannot
+    express).
+    
+    Args:
+        close: Close prices (float64)
+        high: High prices (float64), for the trailing stop
+        buy_mask: True where the strategy wants to enter (when flat)
+        sell_mask: True where the strategy wants to exit (when in position)
+        fee_rate: Fee as a fraction of traded value
+        buy_slip_mul: Fill multiplier on buys (1 + slippage)
+        sell_slip_mul: Fill multiplier on sells (1 - slippage)
+        cap_usd: Position size cap in USD
+        initial_capital: Starting capital
+        take_profit_pct: Take profit threshold in % (inf disables)
+        stop_loss_pct: Stop loss threshold in % (inf disables)
+        trailing_stop_pct: Trailing stop in % below the highest high since
+            entry, entry bar included (inf disables)
+    
+    Returns:
+        Tuple of (equity, entry_idx, exit_idx, entry_fill, exit_fill, quantity,
+        capital, peak_equity, max_drawdown). A position still open at the end
+        is the last trade, with exit_idx -1 and exit_fill 0.
+    """
+    n = close.shape[0]
+    equity = np.empty(n)
+    entry_idx = np.empty(n, dtype=np.int64)
+    exit_idx = np.empty(n, dtype=np.int64)
+    entry_fill = np.empty(n)
+    exit_fill = np.empty(n)
+    quantity = np.empty(n)
+    
+    buy_fee_mul = 1.0 + fee_rate
+    sell_fee_mul = 1.0 - fee_rate
+    capital = initial_capital
+    peak_equity = initial_capital
+    max_drawdown = 0.0
+    in_position = False
+    qty = 0.0
+    entry_price = 0.0
+    highest = 0.0
+    trailing_mul = 1 - trailing_stop_pct / 100
+    open_idx = 0
+    n_trades = 0
+    
+    for i in range(n):
+        c = close[i]
+        
+        if not in_position:
+            if buy_mask[i]:
+                fill = c * buy_slip_mul
+                effective = capital if capital < cap_usd else cap_usd
+                qty = effective / (fill * buy_fee_mul) if fill > 0 else 0.0
+                cost = qty * fill
+                capital -= cost + cost * fee_rate
+                entry_price = fill
+                highest = high[i]
+                open_idx = i
+                in_position = True
+        else:
+            # Return from the entry fill, as the strategies compute it
+            move = (c - entry_price) / entry_price * 100
+            if high[i] > highest:
+                highest = high[i]
+            if sell_mask[i] or move >= take_profit_pct or move <= -stop_loss_pct or \
+                    c <= highest * trailing_mul:
+                fill = c * sell_slip_mul
+                proceeds = qty * fill
+                capital += proceeds * sell_fee_mul
+                
+                entry_idx[n_trades] = open_idx
+                exit_idx[n_trades] = i
+                entry_fill[n_trades] = entry_price
+                exit_fill[n_trades] = fill
+                quantity[n_trades] = qty
+                n_trades += 1
+                in_position = False
+        
+        if in_position:
+            e = capital + qty * (c - entry_price)
+        else:
+            e = capital
+        equity[i] = e
+        
+        # Drawdown on marked-to-market equity, as in BacktestEngine.on_data
+        if e > peak_equity:
+            peak_equity = e
+        dd = (peak_equity - e) / peak_equity * 100
+        if dd > max_drawdown:
+            max_drawdown = dd
+    
+    if in_position:
+        entry_idx[n_trades] = open_idx
+        exit_idx[n_trades] = -1
+        entry_fill[n_trades] = entry_price
+        exit_fill[n_trades] = 0.0
+        quantity[n_trades] = qty
+        n_trades += 1
+    
+    return (
+        equity,
+        entry_idx[:n_trades],
+        exit_idx[:n_trades],
+        entry_fill[:n_trades],
+        exit_fill[:n_trades],
+        quantity[:n_trades],
+        capital,
+        peak_equity,
+        max_drawdown,
+    )
+
+
+@njit(cache=True)
+def _return_stats_kernel(equity: np.ndarray):
+    """Welford mean/variance of the step returns, in one pass with no temporaries."""
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, equity.shape[0]):
+        prev = equity[i - 1]
+        if prev > 0:
+            r = (equity[i] - prev) / prev
+            count += 1
+            delta = r - mean
+            mean += delta / count
+            m2 += delta * (r - mean)
+    std = (m2 / count) ** 0.5 if count > 0 else 0.0
+    return count, mean, std
+
+
+def return_stats(equity: np.ndarray):
+    """
+    Count, mean and (population) std of per-step returns of an equity series.
+    
+    Steps whose previous equity is not positive are skipped. Uses the
+    compiled Welford kernel when Numba is available, otherwise NumPy.
+    """
+    if NUMBA_AVAILABLE or AOT_AVAILABLE:
+        return _return_stats_kernel(equity)
+    
+    prev = equity[:-1]
+    valid = prev > 0
+    if not valid.any():
+        return 0, 0.0, 0.0
+    returns = np.diff(equity)[valid] / prev[valid]
+    return len(returns), float(returns.mean()), float(returns.std())
+
+
+# Prefer the ahead-of-time build (python -m backtest._kernels_aot) when present
+try:
+    from backtest._bt_kernels import simulate, return_stats as _return_stats_kernel
+    AOT_AVAILABLE = True
+except ImportError:
+    AOT_AVAILABLE = False
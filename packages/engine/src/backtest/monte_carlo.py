@@ -3,11 +3,20 @@ Monte Carlo Robustness Analysis
 
 Block bootstrap simulation for backtest robustness validation.
 """
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
-from typing import List, Dict, Any, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, Union
+from dataclasses import dataclass, field
 import logging
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jit import njit, prange, NUMBA_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,78 +42,155 @@ class MonteCarloResult:
     prob_ruin: float  # Probability of equity < threshold
     prob_profit: float  # Probability of positive return
     
-    # All simulation results
-    all_final_equities: List[float]
-    all_max_drawdowns: List[float]
+    # All simulation results (float64 arrays, one entry per simulation)
+    all_final_equities: np.ndarray = field(default_factory=lambda: np.empty(0))
+    all_max_drawdowns: np.ndarray = field(default_factory=lambda: np.empty(0))
 
 
-def block_bootstrap(returns: List[float], block_size: int, num_simulations: int) -> List[List[float]]:
+def block_bootstrap(
+    returns: List[float],
+    block_size: int,
+    num_simulations: int,
+    seed: Union[int, np.random.Generator, None] = None
+) -> np.ndarray:
     """
     Generate block bootstrap samples from returns series.
     
+    All block start indices are drawn in one batch and gathered with a
+    single fancy-indexing operation, so no Python loop runs per simulation.
+    
     Args:
         returns: List of periodic returns (as decimals, e.g., 0.01 for 1%)
-        block_size: Size of blocks to sample
+        block_size: Size of blocks to sample (1 = i.i.d. bootstrap, fastest;
+            fine when trade returns are uncorrelated)
         num_simulations: Number of simulations to run
+        seed: Seed or numpy Generator; a fixed seed makes the samples reproducible
     
     Returns:
-        List of simulated return series
+        Array of shape (num_simulations, len(returns)), one simulated series per row
     """
-    if len(returns) < block_size:
+    ret = np.asarray(returns, dtype=np.float64)
+    n_returns = len(ret)
+    
+    if n_returns < block_size:
         # Fall back to simple bootstrap if not enough data
         block_size = 1
     
-    n_returns = len(returns)
-    simulations = []
+    rng = np.random.default_rng(seed)
     
-    for _ in range(num_simulations):
-        # Create a new series by sampling blocks
-        sampled_returns = []
-        
-        while len(sampled_returns) < n_returns:
-            # Random starting position for block
-            start_idx = np.random.randint(0, n_returns - block_size + 1)
-            block = returns[start_idx:start_idx + block_size]
-            sampled_returns.extend(block)
-        
-        # Trim to original length
-        sampled_returns = sampled_returns[:n_returns]
-        simulations.append(sampled_returns)
+    if block_size <= 1:
+        # Plain i.i.d. resampling: one vectorized draw, the fastest setting
+        return rng.choice(ret, size=(num_simulations, n_returns), replace=True)
+    
+    n_blocks = (n_returns + block_size - 1) // block_size
+    
+    # Random starting position for every block of every simulation
+    starts = rng.integers(0, n_returns - block_size + 1, size=(num_simulations, n_blocks))
+    
+    # Expand each start into its block of consecutive indices, then trim to original length
+    idx = starts[:, :, None] + np.arange(block_size)[None, None, :]
+    idx = idx.reshape(num_simulations, n_blocks * block_size)[:, :n_returns]
     
-    return simulations
+    return ret[idx]
 
 
-def calculate_equity_curve(returns: List[float], initial_capital: float) -> Tuple[List[float], float]:
+def calculate_equity_curve(returns: np.ndarray, initial_capital: float) -> Tuple[np.ndarray, float]:
     """
     Calculate equity curve from returns series.
     
     Returns:
         Tuple of (equity_curve, max_drawdown)
     """
-    equity = initial_capital
-    equity_curve = [equity]
-    peak = equity
-    max_drawdown = 0.0
-    
-    for r in returns:
-        equity *= (1 + r)
-        equity_curve.append(equity)
-        
-        if equity > peak:
-            peak = equity
-        
-        drawdown = (peak - equity) / peak
-        max_drawdown = max(max_drawdown, drawdown)
+    returns = np.asarray(returns, dtype=np.float64)
+    
+    equity_curve = np.empty(len(returns) + 1)
+    equity_curve[0] = initial_capital
+    equity_curve[1:] = initial_capital * np.cumprod(1.0 + returns)
+    
+    # Drawdown against the running peak
+    peaks = np.maximum.accumulate(equity_curve)
+    max_drawdown = float(((peaks - equity_curve) / peaks).max())
     
     return equity_curve, max_drawdown
 
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _mc_kernel(samples: np.ndarray, initial_capital: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stream each simulated path, keeping only its final equity and max drawdown.
+    
+    Memory stays at O(S + N) since no equity curve is materialized.
+    """
+    num_sims, num_steps = samples.shape
+    finals = np.empty(num_sims)
+    max_dds = np.empty(num_sims)
+    
+    for s in prange(num_sims):
+        equity = initial_capital
+        peak = initial_capital
+        max_dd = 0.0
+        for j in range(num_steps):
+            equity *= 1.0 + samples[s, j]
+            if equity > peak:
+                peak = equity
+            dd = (peak - equity) / peak
+            if dd > max_dd:
+                max_dd = dd
+        finals[s] = equity
+        max_dds[s] = max_dd
+    
+    return finals, max_dds
+
+
+def simulate_paths(samples: np.ndarray, initial_capital: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute final equity and max drawdown (as a fraction) for every simulated path.
+    
+    Uses the compiled streaming kernel when Numba is available, otherwise
+    falls back to a vectorized cumprod over the whole sample matrix. The
+    fallback reuses ``samples`` as its equity buffer, so the caller's array
+    is overwritten.
+    """
+    if NUMBA_AVAILABLE:
+        return _mc_kernel(samples, float(initial_capital))
+    
+    # Equity paths for every simulation at once, built in place: 1+r, cumprod, scale
+    equity = np.add(samples, 1.0, out=samples)
+    np.cumprod(equity, axis=1, out=equity)
+    equity *= initial_capital
+    finals = equity[:, -1].copy()
+    
+    # Running peak per path (seeded with the initial capital) in a single extra buffer
+    peaks = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peaks, initial_capital, out=peaks)
+    
+    # Drawdown = 1 - equity/peak, so the max drawdown comes from the min ratio
+    np.divide(equity, peaks, out=peaks)
+    max_dds = 1.0 - peaks.min(axis=1)
+    
+    return finals, max_dds
+
+
+def _simulate_chunk(
+    returns: np.ndarray,
+    block_size: int,
+    num_simulations: int,
+    initial_capital: float,
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Bootstrap and simulate one chunk of paths (runs in a worker process)."""
+    samples = block_bootstrap(returns, block_size, num_simulations, rng)
+    return simulate_paths(samples, initial_capital)
+
+
 def run_monte_carlo(
     trade_returns: List[float],
     initial_capital: float = 10000,
     num_simulations: int = 1000,
     block_size: int = 5,
-    ruin_threshold: float = 0.5  # 50% loss = ruin
+    ruin_threshold: float = 0.5,  # 50% loss = ruin
+    seed: Union[int, np.random.Generator, None] = None,
+    workers: int = 1
 ) -> MonteCarloResult:
     """
     Run Monte Carlo robustness analysis using block bootstrap.
@@ -115,6 +201,8 @@ def run_monte_carlo(
         num_simulations: Number of Monte Carlo simulations
         block_size: Block size for bootstrap
         ruin_threshold: Equity level considered "ruin" (as fraction of initial)
+        seed: Seed or numpy Generator for reproducible simulations (e.g. in CI)
+        workers: Number of processes to split simulations across (-1 = all cores)
     
     Returns:
         MonteCarloResult with distribution statistics
@@ -133,49 +221,66 @@ def run_monte_carlo(
             drawdown_p50=0,
             drawdown_p95=0,
             prob_ruin=0,
-            prob_profit=0,
-            all_final_equities=[],
-            all_max_drawdowns=[]
+            prob_profit=0
         )
     
-    # Run block bootstrap
-    simulations = block_bootstrap(trade_returns, block_size, num_simulations)
-    
-    # Calculate final equity and max drawdown for each simulation
-    final_equities = []
-    max_drawdowns = []
+    rng = np.random.default_rng(seed)
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, num_simulations))
     
-    for sim_returns in simulations:
-        equity_curve, max_dd = calculate_equity_curve(sim_returns, initial_capital)
-        final_equities.append(equity_curve[-1])
-        max_drawdowns.append(max_dd * 100)  # Convert to percentage
+    if workers > 1:
+        # Independent child streams per worker so chunks are not correlated
+        ret = np.asarray(trade_returns, dtype=np.float64)
+        base, extra = divmod(num_simulations, workers)
+        sizes = [base + (1 if i < extra else 0) for i in range(workers)]
+        
+        # spawn, not fork: forking after Numba's threading layer has started can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            parts = list(pool.map(
+                _simulate_chunk,
+                repeat(ret), repeat(block_size), sizes, repeat(initial_capital), rng.spawn(workers)
+            ))
+        
+        equities_arr = np.concatenate([p[0] for p in parts])
+        max_dd = np.concatenate([p[1] for p in parts])
+    else:
+        # Run block bootstrap: one simulated return series per row
+        samples = block_bootstrap(trade_returns, block_size, num_simulations, rng)
+        
+        # Final equity and max drawdown for each simulation
+        equities_arr, max_dd = simulate_paths(samples, initial_capital)
     
     # Calculate statistics
-    equities_arr = np.array(final_equities)
-    drawdowns_arr = np.array(max_drawdowns)
+    drawdowns_arr = max_dd * 100  # Convert to percentage
     
     # Probability of ruin
     ruin_level = initial_capital * ruin_threshold
-    prob_ruin = sum(1 for e in final_equities if e < ruin_level) / len(final_equities)
+    prob_ruin = float((equities_arr < ruin_level).mean())
     
     # Probability of profit
-    prob_profit = sum(1 for e in final_equities if e > initial_capital) / len(final_equities)
+    prob_profit = float((equities_arr > initial_capital).mean())
+    
+    # One sort per distribution for all three quantiles
+    eq_p5, eq_p50, eq_p95 = np.quantile(equities_arr, [0.05, 0.5, 0.95]).tolist()
+    dd_p5, dd_p50, dd_p95 = np.quantile(drawdowns_arr, [0.05, 0.5, 0.95]).tolist()
     
     return MonteCarloResult(
         num_simulations=num_simulations,
         block_size=block_size,
-        equity_p5=float(np.percentile(equities_arr, 5)),
-        equity_p50=float(np.percentile(equities_arr, 50)),
-        equity_p95=float(np.percentile(equities_arr, 95)),
-        equity_mean=float(np.mean(equities_arr)),
-        equity_std=float(np.std(equities_arr)),
-        drawdown_p5=float(np.percentile(drawdowns_arr, 5)),
-        drawdown_p50=float(np.percentile(drawdowns_arr, 50)),
-        drawdown_p95=float(np.percentile(drawdowns_arr, 95)),
+        equity_p5=eq_p5,
+        equity_p50=eq_p50,
+        equity_p95=eq_p95,
+        equity_mean=float(equities_arr.mean()),
+        equity_std=float(equities_arr.std()),
+        drawdown_p5=dd_p5,
+        drawdown_p50=dd_p50,
+        drawdown_p95=dd_p95,
         prob_ruin=prob_ruin,
         prob_profit=prob_profit,
-        all_final_equities=final_equities,
-        all_max_drawdowns=max_drawdowns
+        all_final_equities=equities_arr,
+        all_max_drawdowns=drawdowns_arr
     )
 
 
@@ -183,7 +288,9 @@ def run_monte_carlo_from_equity_curve(
     equity_curve: List[float],
     num_simulations: int = 1000,
     block_size: int = 5,
-    ruin_threshold: float = 0.5
+    ruin_threshold: float = 0.5,
+    seed: Union[int, np.random.Generator, None] = None,
+    workers: int = 1
 ) -> MonteCarloResult:
     """
     Run Monte Carlo from an existing equity curve.
@@ -191,7 +298,7 @@ def run_monte_carlo_from_equity_curve(
     Converts equity curve to returns, then runs bootstrap.
     """
     if len(equity_curve) < 2:
-        return run_monte_carlo([], 0, num_simulations, block_size, ruin_threshold)
+        return run_monte_carlo([], 0, num_simulations, block_size, ruin_threshold, seed, workers)
     
     # Convert equity curve to returns
     returns = []
@@ -202,7 +309,7 @@ def run_monte_carlo_from_equity_curve(
     
     initial = equity_curve[0] if equity_curve else 10000
     
-    return run_monte_carlo(returns, initial, num_simulations, block_size, ruin_threshold)
+    return run_monte_carlo(returns, initial, num_simulations, block_size, ruin_threshold, seed, workers)
 
 
 if __name__ == "__main__":
@@ -217,7 +324,7 @@ if __name__ == "__main__":
         else:
             returns.append(np.random.uniform(-0.08, -0.02))  # Loss
     
-    result = run_monte_carlo(returns, initial_capital=10000, num_simulations=1000)
+    result = run_monte_carlo(returns, initial_capital=10000, num_simulations=1000, seed=42)
     
     print("=== Monte Carlo Results ===")
     print(f"Simulations: {result.num_simulations}")
@@ -3,13 +3,25 @@ Walk-Forward Validation
 
 Rolling window validation for strategy parameter optimization.
 """
+import os
+import math
+import random
 import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from multiprocessing.shared_memory import SharedMemory
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Literal, Optional, Tuple
 from dataclasses import dataclass
 import itertools
 
-from .runner import BacktestEngine, BacktestResult, run_backtest
+import numpy as np
+
+from .runner import (
+    BacktestResult, DEFAULT_DATABASE_URL, _load_candles, _reuse_strategy, _window_bounds,
+    run_backtest_on_candles, candle_window,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -35,19 +47,127 @@ class WalkForwardResult:
     parameter_history: List[Dict[str, Any]]
 
 
-def generate_parameter_grid(param_ranges: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
-    """Generate all parameter combinations from ranges."""
+def generate_parameter_grid(param_ranges: Dict[str, List[Any]]) -> Iterator[Dict[str, Any]]:
+    """Lazily yield all parameter combinations from ranges."""
     if not param_ranges:
-        return [{}]
+        yield {}
+        return
     
     keys = list(param_ranges.keys())
     values = [param_ranges[k] for k in keys]
     
-    combinations = []
     for combo in itertools.product(*values):
-        combinations.append(dict(zip(keys, combo)))
+        yield dict(zip(keys, combo))
+
+
+def sample_parameter_grid(
+    param_ranges: Dict[str, List[Any]],
+    num_samples: int,
+    seed: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield distinct random parameter combinations without building the grid.
     
-    return combinations
+    Samples combination indices and decodes each one in itertools.product
+    order (last parameter varies fastest).
+    
+    Args:
+        param_ranges: Dict of param_name -> list of values
+        num_samples: Number of combinations to draw (capped at the grid size)
+        seed: Seed for reproducible sampling
+    """
+    keys = list(param_ranges.keys())
+    values = [list(param_ranges[k]) for k in keys]
+    total = math.prod(len(v) for v in values)
+    
+    for index in random.Random(seed).sample(range(total), min(num_samples, total)):
+        combo = {}
+        for key, options in zip(reversed(keys), reversed(values)):
+            index, j = divmod(index, len(options))
+            combo[key] = options[j]
+        yield {k: combo[k] for k in keys}
+
+
+def _metric_value(result: BacktestResult, metric: str) -> float:
+    """Extract the optimization metric from a backtest result."""
+    if metric == "total_return":
+        return result.total_return
+    elif metric == "sharpe":
+        return result.sharpe_ratio
+    elif metric == "win_rate":
+        return result.win_rate
+    else:
+        return result.total_return
+
+
+# Candles shared with the pool (every window is a row range of them), set
+# once per worker process, and the strategy instances the worker reuses (it
+# runs one trial at a time)
+_worker_candles: Optional[np.ndarray] = None
+_worker_shm: Optional[SharedMemory] = None
+_worker_strategies: Dict[Any, Any] = {}
+
+
+def _init_worker(shm_name: str, shape: Tuple[int, ...], dtype: np.dtype):
+    """Pool initializer: map the parent's shared candle block (no copy)."""
+    global _worker_candles, _worker_shm
+    _worker_shm = SharedMemory(name=shm_name)
+    _worker_candles = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+    _worker_candles.flags.writeable = False
+
+
+def _evaluate_params(
+    args: Tuple[str, Dict[str, Any], str, int, int]
+) -> Tuple[Dict[str, Any], Optional[float]]:
+    """Run one grid point on rows [lo, hi) of the worker's candles; value is None if it fails."""
+    strategy_id, params, metric, lo, hi = args
+    try:
+        strategy = _reuse_strategy(_worker_strategies, strategy_id, params)
+        result = run_backtest_on_candles(_worker_candles[lo:hi], strategy_id, params, strategy)
+        return params, _metric_value(result, metric)
+    except Exception as e:
+        logger.warning(f"Parameter test failed: {e}")
+        return params, None
+
+
+def _num_trials(param_ranges: Dict[str, List[Any]], max_trials: Optional[int]) -> int:
+    """Number of combinations a search evaluates."""
+    grid_size = math.prod(len(v) for v in param_ranges.values())
+    return grid_size if max_trials is None else min(max_trials, grid_size)
+
+
+def _num_workers(workers: int, num_trials: int) -> int:
+    """Processes worth starting for num_trials trials (-1 = all cores)."""
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    return max(1, min(workers, num_trials))
+
+
+@contextmanager
+def _candle_pool(candles: np.ndarray, workers: int) -> Iterator[ProcessPoolExecutor]:
+    """
+    Worker processes sharing one read-only copy of the candles.
+    
+    The candles are copied once into shared memory; every worker maps the
+    same pages instead of unpickling its own copy, and tasks address their
+    window by row range (see _evaluate_params).
+    """
+    shm = SharedMemory(create=True, size=max(candles.nbytes, 1))
+    try:
+        shared = np.ndarray(candles.shape, dtype=candles.dtype, buffer=shm.buf)
+        shared[...] = candles
+        del shared
+        
+        # spawn, not fork: forking after Numba's threading layer has started can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=ctx,
+            initializer=_init_worker, initargs=(shm.name, candles.shape, candles.dtype)
+        ) as pool:
+            yield pool
+    finally:
+        shm.close()
+        shm.unlink()
 
 
 def optimize_parameters(
@@ -57,7 +177,16 @@ def optimize_parameters(
     market_id: str,
     start_date: datetime,
     end_date: datetime,
-    metric: str = "total_return"
+    metric: str = "total_return",
+    candles: Optional[np.ndarray] = None,
+    database_url: str = None,
+    workers: int = 1,
+    search: Literal["grid", "random"] = "grid",
+    max_trials: Optional[int] = None,
+    seed: Optional[int] = None,
+    strategies: Optional[Dict[Any, Any]] = None,
+    executor: Optional[Executor] = None,
+    window: Optional[Tuple[int, int]] = None
 ) -> Tuple[Dict[str, Any], float]:
     """
     Find best parameters on a training window.
@@ -70,45 +199,76 @@ def optimize_parameters(
         start_date: Start of training window
         end_date: End of training window
         metric: Metric to optimize ("total_return", "sharpe", "win_rate")
+        candles: Preloaded candles for the window (loaded once if None)
+        database_url: Database connection URL
+        workers: Number of processes to spread the grid over (-1 = all cores)
+        search: "grid" walks combinations in order, "random" samples them
+        max_trials: Cap on the number of combinations evaluated (None = all)
+        seed: Seed for random search
+        strategies: Strategy instances to reuse across calls in one process
+            (see runner._reuse_strategy); private to this call if None
+        executor: Pool from _candle_pool to run trials on, kept across calls
+            (started for this call if None and workers > 1)
+        window: Rows [lo, hi) of the executor's shared candles holding
+            `candles` (all of them if None)
     
     Returns:
         Tuple of (best_params, best_metric_value)
     """
-    grid = generate_parameter_grid(param_ranges)
+    num_trials = _num_trials(param_ranges, max_trials)
     
-    best_params = base_params.copy()
-    best_value = float("-inf")
+    if search == "random":
+        grid = sample_parameter_grid(param_ranges, num_trials, seed)
+    else:
+        grid = itertools.islice(generate_parameter_grid(param_ranges), num_trials)
+    
+    # Every grid point runs on the same candles: load them once
+    if candles is None:
+        database_url = database_url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+        candles = _load_candles(market_id, start_date, end_date, database_url)
+    
+    # Merge each grid point with base params (lazily; the grid is never materialized)
+    trials = ({**base_params, **params} for params in grid)
+    
+    workers = _num_workers(workers, num_trials)
     
-    for params in grid:
-        # Merge with base params
-        test_params = {**base_params, **params}
+    if executor is not None or workers > 1:
+        lo, hi = window if window is not None else (0, len(candles))
+        tasks = ((strategy_id, test_params, metric, lo, hi) for test_params in trials)
+        chunksize = max(1, num_trials // (4 * workers))
         
+        if executor is not None:
+            return _best_trial(base_params, executor.map(_evaluate_params, tasks, chunksize=chunksize))
+        with _candle_pool(candles, workers) as pool:
+            return _best_trial(base_params, pool.map(_evaluate_params, tasks, chunksize=chunksize))
+    
+    if strategies is None:
+        strategies = {}
+    
+    def evaluate(test_params: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[float]]:
         try:
-            result = run_backtest(
-                strategy_id=strategy_id,
-                parameters=test_params,
-                market_id=market_id,
-                start_date=start_date,
-                end_date=end_date
-            )
-            
-            # Get metric value
-            if metric == "total_return":
-                value = result.total_return
-            elif metric == "sharpe":
-                value = result.sharpe_ratio
-            elif metric == "win_rate":
-                value = result.win_rate
-            else:
-                value = result.total_return
-            
-            if value > best_value:
-                best_value = value
-                best_params = test_params.copy()
-                
+            strategy = _reuse_strategy(strategies, strategy_id, test_params)
+            result = run_backtest_on_candles(candles, strategy_id, test_params, strategy)
+            return test_params, _metric_value(result, metric)
         except Exception as e:
             logger.warning(f"Parameter test failed: {e}")
-            continue
+            return test_params, None
+    
+    return _best_trial(base_params, map(evaluate, trials))
+
+
+def _best_trial(
+    base_params: Dict[str, Any],
+    results: Iterator[Tuple[Dict[str, Any], Optional[float]]]
+) -> Tuple[Dict[str, Any], float]:
+    """Reduce (params, value) results to the best one as they arrive."""
+    best_params = base_params.copy()
+    best_value = float("-inf")
+    
+    for test_params, value in results:
+        if value is not None and value > best_value:
+            best_value = value
+            best_params = test_params.copy()
     
     return best_params, best_value
 
@@ -122,7 +282,12 @@ def run_walk_forward(
     end_date: datetime,
     train_window_days: int = 60,
     test_window_days: int = 30,
-    optimize_metric: str = "total_return"
+    optimize_metric: str = "total_return",
+    database_url: str = None,
+    workers: int = 1,
+    search: Literal["grid", "random"] = "grid",
+    max_trials: Optional[int] = None,
+    seed: Optional[int] = None
 ) -> WalkForwardResult:
     """
     Run walk-forward validation.
@@ -139,6 +304,12 @@ def run_walk_forward(
         train_window_days: Size of training window
         test_window_days: Size of test window
         optimize_metric: Metric to optimize in training
+        database_url: Database connection URL
+        workers: Processes for the parameter search, started once for all
+            folds (-1 = all cores)
+        search: Parameter search mode per fold ("grid" or "random")
+        max_trials: Cap on combinations evaluated per fold (None = all)
+        seed: Seed for random search
     
     Returns:
         WalkForwardResult with out-of-sample metrics
@@ -150,74 +321,99 @@ def run_walk_forward(
     fold_results = []
     parameter_history = []
     
-    all_test_returns = []
+    # Out-of-sample return per completed fold, filled by index
+    all_test_returns = np.empty(num_folds)
+    num_tested = 0
     all_test_trades = 0
     all_test_wins = 0
     total_drawdown = 0
     
-    for fold in range(num_folds):
-        # Calculate window positions
-        train_start = start_date + timedelta(days=fold * test_window_days)
-        train_end = train_start + timedelta(days=train_window_days)
-        test_start = train_end
-        test_end = test_start + timedelta(days=test_window_days)
-        
-        if test_end > end_date:
-            break
-        
-        logger.info(f"Fold {fold + 1}: train {train_start.date()} to {train_end.date()}, "
-                   f"test {test_start.date()} to {test_end.date()}")
-        
-        # Optimize on training window (or use base params if no ranges)
-        if param_ranges:
-            best_params, _ = optimize_parameters(
-                strategy_id, base_params, param_ranges,
-                market_id, train_start, train_end, optimize_metric
-            )
-        else:
-            best_params = base_params.copy()
-        
-        parameter_history.append(best_params)
-        
-        # Test on test window
-        try:
-            test_result = run_backtest(
-                strategy_id=strategy_id,
-                parameters=best_params,
-                market_id=market_id,
-                start_date=test_start,
-                end_date=test_end
-            )
+    # Strategy instances reused across this run's folds
+    strategies: Dict[Any, Any] = {}
+    
+    # Load the full range once; every train/test window is a slice of it
+    database_url = database_url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+    candles = _load_candles(market_id, start_date, end_date, database_url)
+    
+    # One pool, and one shared copy of the candles, serves every fold's search
+    if param_ranges:
+        workers = _num_workers(workers, _num_trials(param_ranges, max_trials))
+    pool = _candle_pool(candles, workers) if param_ranges and workers > 1 else nullcontext()
+    
+    with pool as executor:
+        for fold in range(num_folds):
+            # Calculate window positions
+            train_start = start_date + timedelta(days=fold * test_window_days)
+            train_end = train_start + timedelta(days=train_window_days)
+            test_start = train_end
+            test_end = test_start + timedelta(days=test_window_days)
             
-            fold_results.append({
-                "fold": fold + 1,
-                "train_start": train_start.isoformat(),
-                "train_end": train_end.isoformat(),
-                "test_start": test_start.isoformat(),
-                "test_end": test_end.isoformat(),
-                "params": best_params,
-                "total_return": test_result.total_return,
-                "win_rate": test_result.win_rate,
-                "max_drawdown": test_result.max_drawdown,
-                "num_trades": test_result.total_trades,
-                "winning_trades": test_result.winning_trades,
-            })
+            if test_end > end_date:
+                break
             
-            all_test_returns.append(test_result.total_return)
-            all_test_trades += test_result.total_trades
-            all_test_wins += test_result.winning_trades
-            total_drawdown = max(total_drawdown, test_result.max_drawdown)
+            logger.info(f"Fold {fold + 1}: train {train_start.date()} to {train_end.date()}, "
+                       f"test {test_start.date()} to {test_end.date()}")
             
-        except Exception as e:
-            logger.warning(f"Fold {fold + 1} test failed: {e}")
-    
+            # Optimize on training window (or use base params if no ranges)
+            if param_ranges:
+                train_lo, train_hi = _window_bounds(candles, train_start, train_end)
+                best_params, _ = optimize_parameters(
+                    strategy_id, base_params, param_ranges,
+                    market_id, train_start, train_end, optimize_metric,
+                    candles=candles[train_lo:train_hi],
+                    workers=workers,
+                    search=search,
+                    max_trials=max_trials,
+                    seed=seed,
+                    strategies=strategies,
+                    executor=executor,
+                    window=(train_lo, train_hi)
+                )
+            else:
+                best_params = base_params.copy()
+            
+            parameter_history.append(best_params)
+            
+            # Test on test window
+            try:
+                test_result = run_backtest_on_candles(
+                    candle_window(candles, test_start, test_end),
+                    strategy_id,
+                    best_params,
+                    _reuse_strategy(strategies, strategy_id, best_params)
+                )
+                
+                fold_results.append({
+                    "fold": fold + 1,
+                    "train_start": train_start.isoformat(),
+                    "train_end": train_end.isoformat(),
+                    "test_start": test_start.isoformat(),
+                    "test_end": test_end.isoformat(),
+                    "params": best_params,
+                    "total_return": test_result.total_return,
+                    "win_rate": test_result.win_rate,
+                    "max_drawdown": test_result.max_drawdown,
+                    "num_trades": test_result.total_trades,
+                    "winning_trades": test_result.winning_trades,
+                })
+                
+                all_test_returns[num_tested] = test_result.total_return
+                num_tested += 1
+                all_test_trades += test_result.total_trades
+                all_test_wins += test_result.winning_trades
+                total_drawdown = max(total_drawdown, test_result.max_drawdown)
+                
+            except Exception as e:
+                logger.warning(f"Fold {fold + 1} test failed: {e}")
+        
     # Calculate aggregate metrics
-    total_return = sum(all_test_returns)
+    returns = all_test_returns[:num_tested]
+    total_return = float(returns.sum())
     win_rate = (all_test_wins / all_test_trades * 100) if all_test_trades > 0 else 0
     
     # Calculate profit factor
-    gross_profit = sum(r for r in all_test_returns if r > 0)
-    gross_loss = abs(sum(r for r in all_test_returns if r < 0))
+    gross_profit = float(returns[returns > 0].sum())
+    gross_loss = float(-returns[returns < 0].sum())
     profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf') if gross_profit > 0 else 0
     
     return WalkForwardResult(
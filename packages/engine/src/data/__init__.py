@@ -1,10 +1,16 @@
 # Data module
 from .db import get_connection as get_db_connection
-from .candle_aggregator import aggregate_candles, aggregate_all_timeframes, on_new_1m_candle
+from .candle_aggregator import (
+    aggregate_candles, aggregate_all_timeframes, backfill_candles, clear_stale_buckets,
+    on_new_1m_candle, seed_open_buckets,
+)
 
 __all__ = [
     "get_db_connection",
     "aggregate_candles",
     "aggregate_all_timeframes",
+    "backfill_candles",
+    "clear_stale_buckets",
     "on_new_1m_candle",
+    "seed_open_buckets",
 ]
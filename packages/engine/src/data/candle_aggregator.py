@@ -2,15 +2,23 @@
 Candle Aggregation Module
 
 Aggregates 1m candles into higher timeframes (15m, 1h, 4h).
-Event-driven: triggered when a new 1m candle is inserted.
+Event-driven: each completed 1m candle is folded into running per-bucket
+aggregates (on_new_1m_candle); aggregate_candles recomputes buckets from
+the 1m candles for backfills and repairs.
+
+Statements run as server-side prepared statements on pooled connections,
+so Postgres parses and plans each of them once per connection.
 """
-from datetime import datetime, timedelta
-from decimal import Decimal
-from typing import Optional, Dict, List, Tuple
+import os
+import sys
+import calendar
+from datetime import datetime, timezone
+from typing import Dict, Final, List, Tuple
 import logging
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.db import get_pool, prepare
 
 logger = logging.getLogger(__name__)
 
@@ -21,11 +29,164 @@ TIMEFRAMES = {
     "4h": {"minutes": 240, "label": "4h"},
 }
 
+# Flat views of TIMEFRAMES for per-candle code: minutes by label, and the
+# (label, minutes) pairs in iteration order
+_TF_MINUTES: Final[Dict[str, int]] = {tf: config["minutes"] for tf, config in TIMEFRAMES.items()}
+_TF_ITEMS: Final[Tuple[Tuple[str, int], ...]] = tuple(_TF_MINUTES.items())
+_TF_LABELS: Final[List[str]] = [tf for tf, _ in _TF_ITEMS]
+_TF_MINUTE_LIST: Final[List[int]] = [minutes for _, minutes in _TF_ITEMS]
+
+# Bucket table rows for the incremental path, unnested from the arrays that
+# _bucket_params produces (parameters $3-$6 of the statements using it)
+_BUCKETS_SQL = "unnest($3, $4, $5, $6) AS tf(interval, minutes, bucket_start, opens)"
+_BUCKET_TYPES = ("uuid", "timestamptz", "varchar[]", "integer[]", "timestamptz[]", "boolean[]")
+
+# Bucket, aggregate and upsert in one statement. Source candles start at the
+# latest existing bucket (inclusive), so that bucket is recomputed from all
+# of its candles; the current, still open bucket is skipped.
+# $1 market_id, $2 from_interval, $3 to_interval, $4 bucket seconds, $5 limit
+_AGGREGATE_SQL = """
+    WITH latest AS (
+        SELECT MAX(timestamp) AS ts
+        FROM market_candles
+        WHERE market_id = $1 AND interval = $3
+    ),
+    source AS (
+        SELECT timestamp, open, high, low, close, volume
+        FROM market_candles
+        WHERE market_id = $1 AND interval = $2
+          AND timestamp >= COALESCE((SELECT ts FROM latest), '-infinity')
+        ORDER BY timestamp ASC
+        LIMIT $5
+    ),
+    bucketed AS (
+        SELECT to_timestamp(floor(extract(epoch FROM timestamp) / $4) * $4) AS bucket,
+               timestamp, open, high, low, close, volume
+        FROM source
+    )
+    INSERT INTO market_candles
+        (market_id, interval, timestamp, open, high, low, close, volume)
+    SELECT $1, $3, bucket,
+           (array_agg(open ORDER BY timestamp ASC))[1],
+           MAX(high),
+           MIN(low),
+           (array_agg(close ORDER BY timestamp DESC))[1],
+           SUM(volume)
+    FROM bucketed
+    WHERE bucket < to_timestamp(floor(extract(epoch FROM now()) / $4) * $4)
+    GROUP BY bucket
+    ON CONFLICT (market_id, interval, timestamp) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume
+"""
+_AGGREGATE_TYPES = ("uuid", "varchar", "varchar", "integer", "bigint")
+
+# Aggregate the completed 1m candles of each open bucket
+# $1 market_id, $2 before, $3-$6 buckets
+_SEED_SQL = f"""
+    INSERT INTO market_candles_wip AS w
+        (market_id, interval, bucket_start, bucket_minutes,
+         open, high, low, close, volume, candle_count, last_timestamp)
+    SELECT $1, tf.interval, tf.bucket_start, tf.minutes,
+           (array_agg(c.open ORDER BY c.timestamp ASC))[1],
+           MAX(c.high),
+           MIN(c.low),
+           (array_agg(c.close ORDER BY c.timestamp DESC))[1],
+           SUM(c.volume),
+           COUNT(*),
+           MAX(c.timestamp)
+    FROM {_BUCKETS_SQL}
+    JOIN market_candles c
+      ON c.market_id = $1 AND c.interval = '1m'
+     AND c.timestamp >= tf.bucket_start AND c.timestamp < $2
+    GROUP BY tf.interval, tf.minutes, tf.bucket_start
+    ON CONFLICT (market_id, interval, bucket_start) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume,
+        candle_count = EXCLUDED.candle_count,
+        last_timestamp = EXCLUDED.last_timestamp
+"""
 
-def get_db_connection(database_url: str):
-    """Get database connection."""
-    return psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+# Fold one 1m candle into the running aggregates of its buckets. A bucket
+# without one is opened by its first 1m candle: at its first minute, or the
+# earliest one present when the bucket started before any of its candles.
+# $1 market_id, $2 candle_time, $3-$6 buckets
+_FOLD_SQL = f"""
+    WITH candle AS (
+        SELECT timestamp, open, high, low, close, volume
+        FROM market_candles
+        WHERE market_id = $1 AND interval = '1m' AND timestamp = $2
+    ),
+    folded AS (
+        SELECT tf.interval, tf.minutes, tf.bucket_start, tf.opens,
+               c.timestamp, c.open, c.high, c.low, c.close, c.volume
+        FROM candle c
+        CROSS JOIN {_BUCKETS_SQL}
+    )
+    INSERT INTO market_candles_wip AS w
+        (market_id, interval, bucket_start, bucket_minutes,
+         open, high, low, close, volume, candle_count, last_timestamp)
+    SELECT $1, f.interval, f.bucket_start, f.minutes,
+           f.open, f.high, f.low, f.close, f.volume, 1, f.timestamp
+    FROM folded f
+    WHERE f.opens
+       OR EXISTS (
+           SELECT 1 FROM market_candles_wip x
+           WHERE x.market_id = $1 AND x.interval = f.interval
+             AND x.bucket_start = f.bucket_start
+       )
+       OR NOT EXISTS (
+           SELECT 1 FROM market_candles m
+           WHERE m.market_id = $1 AND m.interval = '1m'
+             AND m.timestamp >= f.bucket_start AND m.timestamp < f.timestamp
+       )
+    ON CONFLICT (market_id, interval, bucket_start) DO UPDATE SET
+        high = GREATEST(w.high, EXCLUDED.high),
+        low = LEAST(w.low, EXCLUDED.low),
+        close = EXCLUDED.close,
+        volume = w.volume + EXCLUDED.volume,
+        candle_count = w.candle_count + 1,
+        last_timestamp = EXCLUDED.last_timestamp
+    WHERE w.last_timestamp < EXCLUDED.last_timestamp
+"""
 
+# Move finished buckets (complete, or superseded by a later bucket) into
+# market_candles. $1 market_id, $2 candle_time
+_FLUSH_SQL = """
+    WITH done AS (
+        DELETE FROM market_candles_wip
+        WHERE market_id = $1
+          AND (candle_count >= bucket_minutes
+               OR bucket_start + make_interval(mins => bucket_minutes) <= $2)
+        RETURNING interval, bucket_start, open, high, low, close, volume
+    )
+    INSERT INTO market_candles
+        (market_id, interval, timestamp, open, high, low, close, volume)
+    SELECT $1, interval, bucket_start, open, high, low, close, volume
+    FROM done
+    ON CONFLICT (market_id, interval, timestamp) DO UPDATE SET
+        open = EXCLUDED.open,
+        high = EXCLUDED.high,
+        low = EXCLUDED.low,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume
+    RETURNING interval
+"""
+_FLUSH_TYPES = ("uuid", "timestamptz")
+
+# Drop running aggregates of buckets closed before $2 (left over from before
+# a restart). $1 market_id, $2 before
+_CLEAR_STALE_SQL = """
+    DELETE FROM market_candles_wip
+    WHERE market_id = $1
+      AND bucket_start + make_interval(mins => bucket_minutes) <= $2
+"""
 
 def get_bucket_start(timestamp: datetime, interval_minutes: int) -> datetime:
     """Calculate the start of the bucket for a given timestamp."""
@@ -47,6 +208,25 @@ def get_bucket_start(timestamp: datetime, interval_minutes: int) -> datetime:
     )
 
 
+def _bucket_params(candle_time: datetime) -> Tuple[List[str], List[int], List[datetime], List[bool]]:
+    """
+    Bucket of every timeframe containing candle_time, as SQL array parameters.
+    
+    The epoch minute is computed once; each bucket start is an integer floor
+    of it. The last array marks the timeframes whose bucket starts at
+    candle_time. Naive datetimes are taken as UTC.
+    """
+    epoch_min = calendar.timegm(candle_time.utctimetuple()) // 60
+    offsets = [epoch_min % minutes for minutes in _TF_MINUTE_LIST]
+    
+    return (
+        _TF_LABELS,
+        _TF_MINUTE_LIST,
+        [datetime.fromtimestamp((epoch_min - offset) * 60, timezone.utc) for offset in offsets],
+        [offset == 0 for offset in offsets],
+    )
+
+
 def aggregate_candles(
     database_url: str,
     market_id: str,
@@ -55,116 +235,26 @@ def aggregate_candles(
     limit: int = 100
 ) -> int:
     """
-    Aggregate candles from one interval to another.
+    Aggregate candles from one interval to another, entirely in Postgres.
     
-    Returns the number of new candles created.
+    Returns the number of candles created or updated.
     """
-    if to_interval not in TIMEFRAMES:
+    interval_minutes = _TF_MINUTES.get(to_interval)
+    if interval_minutes is None:
         logger.error(f"Unknown timeframe: {to_interval}")
         return 0
     
-    interval_minutes = TIMEFRAMES[to_interval]["minutes"]
-    
-    conn = get_db_connection(database_url)
+    pool = get_pool(database_url)
+    conn = pool.getconn()
     created_count = 0
     
     try:
         with conn.cursor() as cur:
-            # Get the latest bucket we have for this interval
-            cur.execute("""
-                SELECT MAX(timestamp) as latest
-                FROM market_candles
-                WHERE market_id = %s AND interval = %s
-            """, (market_id, to_interval))
-            row = cur.fetchone()
-            latest_bucket = row["latest"] if row and row["latest"] else None
-            
-            # Get 1m candles that need to be aggregated
-            if latest_bucket:
-                # Get candles after the last bucket
-                cur.execute("""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM market_candles
-                    WHERE market_id = %s AND interval = %s
-                      AND timestamp > %s
-                    ORDER BY timestamp ASC
-                    LIMIT %s
-                """, (market_id, from_interval, latest_bucket, limit))
-            else:
-                # No existing buckets, aggregate all available
-                cur.execute("""
-                    SELECT timestamp, open, high, low, close, volume
-                    FROM market_candles
-                    WHERE market_id = %s AND interval = %s
-                    ORDER BY timestamp ASC
-                    LIMIT %s
-                """, (market_id, from_interval, limit))
-            
-            candles = cur.fetchall()
-            
-            if not candles:
-                return 0
-            
-            # Group candles by bucket
-            buckets: Dict[datetime, List] = {}
-            for candle in candles:
-                ts = candle["timestamp"]
-                # Strip timezone for comparison
-                if ts.tzinfo is not None:
-                    ts = ts.replace(tzinfo=None)
-                bucket_start = get_bucket_start(ts, interval_minutes)
-                if bucket_start not in buckets:
-                    buckets[bucket_start] = []
-                buckets[bucket_start].append(candle)
-            
-            # Create aggregated candles for complete buckets only
-            now = datetime.utcnow()
-            current_bucket = get_bucket_start(now, interval_minutes)
-            
-            # Also strip tz from latest_bucket if present
-            if latest_bucket and latest_bucket.tzinfo is not None:
-                latest_bucket = latest_bucket.replace(tzinfo=None)
-            
-            for bucket_start, bucket_candles in sorted(buckets.items()):
-                # Skip the current (incomplete) bucket
-                if bucket_start >= current_bucket:
-                    continue
-                
-                # Check if bucket is complete
-                expected_candles = interval_minutes
-                # For 1m source, we expect interval_minutes candles per bucket
-                
-                # Aggregate OHLCV
-                opens = [Decimal(str(c["open"])) for c in bucket_candles]
-                highs = [Decimal(str(c["high"])) for c in bucket_candles]
-                lows = [Decimal(str(c["low"])) for c in bucket_candles]
-                closes = [Decimal(str(c["close"])) for c in bucket_candles]
-                volumes = [Decimal(str(c["volume"])) for c in bucket_candles]
-                
-                if not closes:
-                    continue
-                
-                agg_open = opens[0]
-                agg_high = max(highs)
-                agg_low = min(lows)
-                agg_close = closes[-1]
-                agg_volume = sum(volumes)
-                
-                # Insert aggregated candle
-                cur.execute("""
-                    INSERT INTO market_candles 
-                        (market_id, interval, timestamp, open, high, low, close, volume)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (market_id, interval, timestamp) DO UPDATE SET
-                        high = EXCLUDED.high,
-                        low = EXCLUDED.low,
-                        close = EXCLUDED.close,
-                        volume = EXCLUDED.volume
-                """, (
-                    market_id, to_interval, bucket_start,
-                    agg_open, agg_high, agg_low, agg_close, agg_volume
-                ))
-                created_count += 1
+            cur.execute(
+                prepare(cur, "aggregate_candles", _AGGREGATE_SQL, _AGGREGATE_TYPES),
+                (market_id, from_interval, to_interval, interval_minutes * 60, limit)
+            )
+            created_count = cur.rowcount
             
             conn.commit()
             
@@ -172,11 +262,44 @@ def aggregate_candles(
         logger.error(f"Failed to aggregate candles: {e}")
         conn.rollback()
     finally:
-        conn.close()
+        pool.putconn(conn)
     
     return created_count
 
 
+def backfill_candles(
+    database_url: str,
+    market_id: str,
+    to_interval: str = "15m",
+    batch_buckets: int = 500
+) -> int:
+    """
+    Aggregate all pending 1m candles into a timeframe, in bounded batches.
+    
+    aggregate_candles does the work in Postgres, so no rows are fetched into
+    Python however large the backlog; batching keeps each statement's sort
+    and transaction bounded. Every batch spans batch_buckets buckets and
+    restarts at the latest written one (recomputing a bucket a previous
+    batch may have cut short), until a batch adds nothing new.
+    
+    Returns the number of candles created or updated.
+    """
+    interval_minutes = _TF_MINUTES.get(to_interval)
+    if interval_minutes is None:
+        logger.error(f"Unknown timeframe: {to_interval}")
+        return 0
+    
+    # At least two buckets per batch, so each one advances past the restart bucket
+    limit = max(batch_buckets, 2) * interval_minutes
+    total = 0
+    
+    while True:
+        count = aggregate_candles(database_url, market_id, "1m", to_interval, limit=limit)
+        total += count
+        if count <= 1:
+            return total
+
+
 def aggregate_all_timeframes(database_url: str, market_id: str) -> Dict[str, int]:
     """
     Aggregate 1m candles to all higher timeframes.
@@ -185,7 +308,7 @@ def aggregate_all_timeframes(database_url: str, market_id: str) -> Dict[str, int
     """
     results = {}
     
-    for timeframe in ["15m", "1h", "4h"]:
+    for timeframe, _ in _TF_ITEMS:
         count = aggregate_candles(
             database_url, market_id,
             from_interval="1m",
@@ -198,20 +321,117 @@ def aggregate_all_timeframes(database_url: str, market_id: str) -> Dict[str, int
     return results
 
 
-def on_new_1m_candle(database_url: str, market_id: str, candle_time: datetime):
+def clear_stale_buckets(database_url: str, market_id: str, before: datetime) -> int:
+    """
+    Discard the running aggregates of buckets that closed before `before`.
+    
+    Rows left in market_candles_wip by a previous run only hold the minutes
+    folded before it stopped; flushing them would overwrite the candles
+    backfill_candles rebuilds from the 1m data. Call before backfilling.
+    
+    Returns the number of running aggregates discarded.
+    """
+    pool = get_pool(database_url)
+    conn = pool.getconn()
+    cleared = 0
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                prepare(cur, "clear_stale_buckets", _CLEAR_STALE_SQL, _FLUSH_TYPES),
+                (market_id, before)
+            )
+            cleared = cur.rowcount
+            
+            conn.commit()
+            
+    except Exception as e:
+        logger.error(f"Failed to clear stale buckets: {e}")
+        conn.rollback()
+    finally:
+        pool.putconn(conn)
+    
+    return cleared
+
+
+def seed_open_buckets(database_url: str, market_id: str, before: datetime) -> int:
     """
-    Called when a new 1m candle is inserted.
-    Triggers aggregation if we've crossed a bucket boundary.
+    Build the running aggregates of the buckets still open at `before`.
+    
+    Folds the completed 1m candles of each open bucket (those earlier than
+    `before`) into market_candles_wip, so incremental aggregation can pick
+    up mid-bucket, e.g. when the worker starts. Scans at most one bucket
+    per timeframe; call once, then fold each candle with on_new_1m_candle.
+    
+    Returns the number of running aggregates written.
     """
-    # Check if we've crossed any bucket boundaries
-    for timeframe, config in TIMEFRAMES.items():
-        interval_minutes = config["minutes"]
-        
-        # Check if this candle completes a bucket
-        bucket_start = get_bucket_start(candle_time, interval_minutes)
-        bucket_end = bucket_start + timedelta(minutes=interval_minutes)
-        
-        # If the next candle would be in a new bucket, aggregate the previous one
-        if candle_time.minute % interval_minutes == interval_minutes - 1:
-            # This is the last candle in the bucket, trigger aggregation
-            aggregate_candles(database_url, market_id, "1m", timeframe, limit=interval_minutes + 10)
+    pool = get_pool(database_url)
+    conn = pool.getconn()
+    seeded = 0
+    
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                prepare(cur, "seed_open_buckets", _SEED_SQL, _BUCKET_TYPES),
+                (market_id, before, *_bucket_params(before))
+            )
+            seeded = cur.rowcount
+            
+            conn.commit()
+            
+    except Exception as e:
+        logger.error(f"Failed to seed open buckets: {e}")
+        conn.rollback()
+    finally:
+        pool.putconn(conn)
+    
+    return seeded
+
+
+def on_new_1m_candle(database_url: str, market_id: str, candle_time: datetime) -> Dict[str, int]:
+    """
+    Fold a completed 1m candle into the running higher-timeframe aggregates.
+    
+    OHLCV is a monoid (first open, max high, min low, last close, summed
+    volume), so each bucket's aggregate in market_candles_wip is updated in
+    O(1) instead of re-reading its 1m candles. A running aggregate starts at
+    its bucket's first 1m candle (or from seed_open_buckets) and is moved into
+    market_candles once it holds every minute of the bucket, or once a
+    later bucket has started (gaps in the 1m data). Folding the same candle
+    twice is a no-op.
+    
+    Args:
+        database_url: Database connection URL
+        market_id: Market the candle belongs to
+        candle_time: Timestamp of the 1m candle that just closed
+    
+    Returns:
+        Dict of {timeframe: count} for candles written to market_candles.
+    """
+    pool = get_pool(database_url)
+    conn = pool.getconn()
+    results = dict.fromkeys(_TF_LABELS, 0)
+    
+    try:
+        with conn.cursor() as cur:
+            fold = prepare(cur, "fold_1m_candle", _FOLD_SQL, _BUCKET_TYPES)
+            flush = prepare(cur, "flush_wip_buckets", _FLUSH_SQL, _FLUSH_TYPES)
+            
+            # Fold and flush in one round trip and transaction; only the
+            # flush's rows come back
+            cur.execute(
+                f"{fold}; {flush}",
+                (market_id, candle_time, *_bucket_params(candle_time), market_id, candle_time)
+            )
+            for row in cur.fetchall():
+                results[row["interval"]] += 1
+            
+            conn.commit()
+            
+    except Exception as e:
+        logger.error(f"Failed to fold 1m candle: {e}")
+        conn.rollback()
+    finally:
+        pool.putconn(conn)
+    
+    return results
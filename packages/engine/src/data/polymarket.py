@@ -5,12 +5,21 @@ Ingests active markets from Polymarket using public Gamma API.
 Read-only - no authenticated trading.
 """
 import os
-import time
+import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import TokenBucket
+from data.db import get_markets, get_markets_light
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +28,21 @@ GAMMA_API_BASE = "https://gamma-api.polymarket.com"
 MARKETS_ENDPOINT = f"{GAMMA_API_BASE}/markets"
 EVENTS_ENDPOINT = f"{GAMMA_API_BASE}/events"
 
-# Rate limiting
-REQUEST_DELAY = 0.5  # Conservative delay between requests
-last_request_time = 0
+# Shared session: keeps Gamma API connections alive between calls
+_session = requests.Session()
+_session.headers.update({"User-Agent": "Polypaper/1.0"})
+_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+# Rate limiting: conservative sustained rate, small bursts for concurrent fetches
+REQUEST_RATE = 2.0  # Requests per second
+REQUEST_BURST = 5
+MAX_CONCURRENT_REQUESTS = 5
+_limiter = TokenBucket(REQUEST_RATE, REQUEST_BURST)
 
 
 def _rate_limit():
-    """Enforce rate limiting."""
-    global last_request_time
-    elapsed = time.time() - last_request_time
-    if elapsed < REQUEST_DELAY:
-        time.sleep(REQUEST_DELAY - elapsed)
-    last_request_time = time.time()
+    """Enforce rate limiting (shared by all threads)."""
+    _limiter.acquire()
 
 
 def fetch_markets(
@@ -63,14 +75,41 @@ def fetch_markets(
     params = {k: v for k, v in params.items() if v is not None}
     
     try:
-        resp = requests.get(MARKETS_ENDPOINT, params=params, timeout=10)
+        resp = _session.get(MARKETS_ENDPOINT, params=params, timeout=10)
         resp.raise_for_status()
-        return resp.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(resp.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         logger.error(f"Failed to fetch Polymarket markets: {e}")
         return []
 
 
+def fetch_markets_by_tags(
+    tags: List[str],
+    limit: int = 100,
+    active_only: bool = True
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch markets for several tags concurrently.
+    
+    Requests overlap on the shared session while the token bucket keeps the
+    overall request rate in check.
+    
+    Args:
+        tags: Tags to fetch (e.g., ["Politics", "Crypto"])
+        limit: Maximum number of markets per tag
+        active_only: Only return active markets
+    
+    Returns:
+        Dict of tag -> list of market dicts
+    """
+    if not tags:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(tags))) as pool:
+        results = pool.map(lambda tag: fetch_markets(limit, active_only, tag), tags)
+        return dict(zip(tags, results))
+
+
 def fetch_events(limit: int = 50, active_only: bool = True) -> List[Dict[str, Any]]:
     """
     Fetch events from Polymarket Gamma API.
@@ -94,10 +133,10 @@ def fetch_events(limit: int = 50, active_only: bool = True) -> List[Dict[str, An
     params = {k: v for k, v in params.items() if v is not None}
     
     try:
-        resp = requests.get(EVENTS_ENDPOINT, params=params, timeout=10)
+        resp = _session.get(EVENTS_ENDPOINT, params=params, timeout=10)
         resp.raise_for_status()
-        return resp.json()
-    except requests.exceptions.RequestException as e:
+        return orjson.loads(resp.content)
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
         logger.error(f"Failed to fetch Polymarket events: {e}")
         return []
 
@@ -119,9 +158,10 @@ def parse_polymarket_market(market: Dict[str, Any]) -> Dict[str, Any]:
     # Get question/description
     question = market.get("question", market.get("name", "Unknown"))
     
-    # Get prices
-    yes_price = Decimal(str(market.get("outcomePrices", ["0.5", "0.5"])[0])) / 100
-    no_price = Decimal(str(market.get("outcomePrices", ["0.5", "0.5"])[1] if len(market.get("outcomePrices", [])) > 1 else 0.5)) / 100
+    # Get prices (decimal strings in the API response)
+    outcome_prices = market.get("outcomePrices", ["0.5", "0.5"])
+    yes_price = Decimal(outcome_prices[0]) / 100
+    no_price = Decimal(outcome_prices[1] if len(outcome_prices) > 1 else "0.5") / 100
     
     # Metadata
     metadata = {
@@ -163,38 +203,43 @@ def ingest_polymarket_markets(db_connection, limit: int = 50) -> int:
         logger.warning("No Polymarket markets fetched")
         return 0
     
-    inserted = 0
+    # One row per symbol: a multi-row upsert may not touch the same row twice
+    rows: Dict[str, tuple] = {}
+    for market in markets:
+        try:
+            parsed = parse_polymarket_market(market)
+            rows[parsed["symbol"]] = (
+                parsed["symbol"],
+                parsed["type"],
+                parsed["source"],
+                parsed["name"],
+                parsed["tick_size"],
+                parsed["min_quantity"],
+                orjson.dumps(parsed["metadata"]).decode()
+            )
+        except Exception as e:
+            logger.error(f"Failed to parse market {market.get('conditionId', 'unknown')}: {e}")
+    
+    if not rows:
+        return 0
     
     with db_connection.cursor() as cur:
-        for market in markets:
-            try:
-                parsed = parse_polymarket_market(market)
-                
-                cur.execute("""
-                    INSERT INTO markets (symbol, type, source, name, tick_size, min_quantity, metadata)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (symbol) DO UPDATE SET
-                        name = EXCLUDED.name,
-                        metadata = EXCLUDED.metadata,
-                        updated_at = NOW()
-                """, (
-                    parsed["symbol"],
-                    parsed["type"],
-                    parsed["source"],
-                    parsed["name"],
-                    parsed["tick_size"],
-                    parsed["min_quantity"],
-                    json.dumps(parsed["metadata"])
-                ))
-                inserted += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to insert market {market.get('conditionId', 'unknown')}: {e}")
+        # Unchanged markets are skipped instead of rewritten (no dead tuples or WAL)
+        written = execute_values(cur, """
+            INSERT INTO markets (symbol, type, source, name, tick_size, min_quantity, metadata)
+            VALUES %s
+            ON CONFLICT (symbol) DO UPDATE SET
+                name = EXCLUDED.name,
+                metadata = EXCLUDED.metadata,
+                updated_at = NOW()
+            WHERE markets.metadata IS DISTINCT FROM EXCLUDED.metadata
+               OR markets.name IS DISTINCT FROM EXCLUDED.name
+            RETURNING 1
+        """, list(rows.values()), page_size=500, fetch=True)
     
     db_connection.commit()
-    logger.info(f"Ingested {inserted} Polymarket markets")
+    get_markets.cache_clear()
+    get_markets_light.cache_clear()
+    inserted = len(written)
+    logger.info(f"Ingested {inserted} Polymarket markets ({len(rows) - inserted} unchanged)")
     return inserted
-
-
-# Import json for metadata serialization
-import json
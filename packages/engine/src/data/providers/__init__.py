@@ -3,9 +3,22 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from dataclasses import dataclass
+import numpy as np
+import orjson
 import requests
 
 
+# Structured candle layout (same as backtest.runner.CANDLE_DTYPE)
+OHLCV_DTYPE = np.dtype([
+    ("ts", np.int64),  # unix ms
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+])
+
+
 @dataclass
 class Ticker:
     symbol: str
@@ -52,7 +65,7 @@ class BinanceProvider(DataProvider):
                 timeout=10
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
             
             return Ticker(
                 symbol=symbol,
@@ -65,7 +78,13 @@ class BinanceProvider(DataProvider):
             return None
     
     def get_ohlcv(self, symbol: str, interval: str = "1h", limit: int = 100) -> List[Dict]:
-        """Get OHLCV candles from Binance."""
+        """
+        Get OHLCV candles from Binance.
+        
+        Prices and volume stay the exchange's decimal strings: exact, and
+        accepted as-is by Decimal(), float() and Postgres NUMERIC columns
+        (save_candles, bulk_save_candles), so no per-field Decimal is built.
+        """
         try:
             binance_symbol = self._convert_symbol(symbol)
             resp = self.session.get(
@@ -74,22 +93,53 @@ class BinanceProvider(DataProvider):
                 timeout=10
             )
             resp.raise_for_status()
-            data = resp.json()
+            data = orjson.loads(resp.content)
             
             return [
                 {
                     "timestamp": candle[0],
-                    "open": Decimal(candle[1]),
-                    "high": Decimal(candle[2]),
-                    "low": Decimal(candle[3]),
-                    "close": Decimal(candle[4]),
-                    "volume": Decimal(candle[5]),
+                    "open": candle[1],
+                    "high": candle[2],
+                    "low": candle[3],
+                    "close": candle[4],
+                    "volume": candle[5],
                 }
                 for candle in data
             ]
         except Exception as e:
             print(f"[Binance] Error fetching OHLCV for {symbol}: {e}")
             return []
+    
+    def get_ohlcv_array(self, symbol: str, interval: str = "1h", limit: int = 100) -> np.ndarray:
+        """
+        Get OHLCV candles from Binance as a structured array (for backfills).
+        
+        Columns are converted in bulk by NumPy rather than field by field;
+        pairs with data.db.bulk_save_candle_array.
+        
+        Returns:
+            Array with OHLCV_DTYPE fields (empty on error)
+        """
+        try:
+            binance_symbol = self._convert_symbol(symbol)
+            resp = self.session.get(
+                f"{self.BASE_URL}/api/v3/klines",
+                params={"symbol": binance_symbol, "interval": interval, "limit": limit},
+                timeout=10
+            )
+            resp.raise_for_status()
+            data = orjson.loads(resp.content)
+            
+            candles = np.empty(len(data), dtype=OHLCV_DTYPE)
+            if data:
+                table = np.array([candle[:6] for candle in data], dtype=str)
+                candles["ts"] = table[:, 0].astype(np.int64)
+                for i, name in enumerate(("open", "high", "low", "close", "volume"), start=1):
+                    candles[name] = table[:, i].astype(np.float64)
+            return candles
+        except Exception as e:
+            print(f"[Binance] Error fetching OHLCV for {symbol}: {e}")
+            return np.empty(0, dtype=OHLCV_DTYPE)
 
 
 class PolymarketProvider(DataProvider):
@@ -111,7 +161,7 @@ class PolymarketProvider(DataProvider):
                 timeout=15
             )
             resp.raise_for_status()
-            return resp.json()
+            return orjson.loads(resp.content)
         except Exception as e:
             print(f"[Polymarket] Error fetching markets: {e}")
             return []
@@ -126,7 +176,7 @@ class PolymarketProvider(DataProvider):
                 timeout=10
             )
             if resp.status_code == 200:
-                data = resp.json()
+                data = orjson.loads(resp.content)
                 return Ticker(
                     symbol=symbol,
                     price=Decimal(data.get("price", "0.5")),
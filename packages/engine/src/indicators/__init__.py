@@ -1,10 +1,16 @@
 # Indicators module
-from .adx import calculate_adx, get_trend_direction, is_trending
-from .bollinger import calculate_bollinger_bands, mean_reversion_signal, is_squeeze
-from .rsi import calculate_rsi, is_overbought, is_oversold, rsi_signal
+from .adx import (
+    calculate_adx, calculate_adx_series, calculate_adx_windowed, get_trend_direction, is_trending, ADXState,
+)
+from .bollinger import (
+    calculate_bollinger_bands, calculate_bollinger_series, mean_reversion_signal, is_squeeze, BollingerState,
+)
+from .rsi import calculate_rsi, calculate_rsi_series, is_overbought, is_oversold, rsi_signal, RSIState
 
 __all__ = [
-    "calculate_adx", "get_trend_direction", "is_trending",
-    "calculate_bollinger_bands", "mean_reversion_signal", "is_squeeze",
-    "calculate_rsi", "is_overbought", "is_oversold", "rsi_signal",
+    "calculate_adx", "calculate_adx_series", "calculate_adx_windowed", "get_trend_direction", "is_trending",
+    "ADXState",
+    "calculate_bollinger_bands", "calculate_bollinger_series", "mean_reversion_signal", "is_squeeze",
+    "BollingerState",
+    "calculate_rsi", "calculate_rsi_series", "is_overbought", "is_oversold", "rsi_signal", "RSIState",
 ]
@@ -0,0 +1,31 @@
+"""
+Ahead-of-time build of the indicator kernels.
+
+Compiles the Numba kernels in indicators.kernels into a native extension
+(indicators/_ind_kernels*.so), so short-lived processes (cron jobs, CLI
+runs) computing indicators skip the JIT warmup entirely:
+
+    cd packages/engine/src && python -m indicators._kernels_aot
+
+kernels.py uses the extension when it is present and falls back to the
+cached JIT otherwise. Numba and a C compiler are only needed at build time.
+Rebuild after changing a kernel or its signature.
+"""
+import os
+
+from numba.pycc import CC
+
+from indicators.kernels import wilder_smooth_loop, adx_fused, rsi_averages
+
+cc = CC("_ind_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export("wilder_smooth_loop", "f8[:](f8[:], i8)")(wilder_smooth_loop.py_func)
+
+cc.export("adx_fused", "UniTuple(f8, 3)(f8[:], f8[:], f8[:], i8)")(adx_fused.py_func)
+
+cc.export("rsi_averages", "UniTuple(f8, 2)(f8[:], i8)")(rsi_averages.py_func)
+
+
+if __name__ == "__main__":
+    cc.compile()
@@ -12,32 +12,34 @@ If values exceed this, there's a bug in the implementation.
 """
 from decimal import Decimal
 from typing import List, Tuple, Optional
-import math
+import os
+import sys
 import logging
 
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.kernels import adx_fused, as_float_array, wilder_smooth_loop, AOT_AVAILABLE
+from utils.jit import NUMBA_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
 
-def wilder_smooth(values: List[float], period: int) -> List[float]:
+def wilder_smooth(values: np.ndarray, period: int) -> np.ndarray:
     """
     Wilder's smoothing (RMA - Running Moving Average).
     
     First value is SMA of first `period` values.
     Subsequent values: RMA = (prev_RMA * (period-1) + current) / period
+    
+    The recurrence runs in the compiled kernel (indicators.kernels).
     """
+    values = np.asarray(values, dtype=np.float64)
     if len(values) < period:
-        return []
-    
-    smoothed = []
-    # First value: SMA of first `period` values
-    smoothed.append(sum(values[:period]) / period)
-    
-    # Subsequent values: Wilder's smoothing
-    for i in range(period, len(values)):
-        new_val = (smoothed[-1] * (period - 1) + values[i]) / period
-        smoothed.append(new_val)
+        return np.empty(0)
     
-    return smoothed
+    return wilder_smooth_loop(values, period)
 
 
 def calculate_adx(
@@ -63,103 +65,162 @@ def calculate_adx(
     if len(highs) < period * 2 + 1:
         return None
     
-    n = len(highs)
+    # Convert once; the fallback below works on whole arrays
+    h = as_float_array(highs)
+    l = as_float_array(lows)
+    c = as_float_array(closes)
     
-    # Calculate True Range and Directional Movement for each period
-    tr_list = []
-    plus_dm_list = []
-    minus_dm_list = []
+    if NUMBA_AVAILABLE or AOT_AVAILABLE:
+        # One compiled pass, no intermediate arrays
+        return _format_adx(*adx_fused(h, l, c, period))
     
-    for i in range(1, n):
-        high = float(highs[i])
-        low = float(lows[i])
-        close_prev = float(closes[i-1])
-        high_prev = float(highs[i-1])
-        low_prev = float(lows[i-1])
-        
-        # True Range: max of (H-L, |H-Cp|, |L-Cp|)
-        tr = max(
-            high - low,
-            abs(high - close_prev),
-            abs(low - close_prev)
-        )
-        tr_list.append(tr)
-        
-        # Directional Movement
-        up_move = high - high_prev
-        down_move = low_prev - low
-        
-        # +DM = up_move if up_move > down_move AND up_move > 0, else 0
-        # -DM = down_move if down_move > up_move AND down_move > 0, else 0
-        if up_move > down_move and up_move > 0:
-            plus_dm = up_move
-        else:
-            plus_dm = 0
-            
-        if down_move > up_move and down_move > 0:
-            minus_dm = down_move
-        else:
-            minus_dm = 0
-        
-        plus_dm_list.append(plus_dm)
-        minus_dm_list.append(minus_dm)
+    plus_di_vals, minus_di_vals, adx_vals = _adx_arrays(h, l, c, period)
     
-    if len(tr_list) < period:
-        return None
+    return _format_adx(float(adx_vals[-1]), float(plus_di_vals[-1]), float(minus_di_vals[-1]))
+
+
+def _adx_arrays(
+    h: np.ndarray,
+    l: np.ndarray,
+    c: np.ndarray,
+    period: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    +DI, -DI (clamped to [0, 100]) and ADX arrays over float64 bars.
     
-    # Apply Wilder's smoothing to TR, +DM, -DM
-    atr = wilder_smooth(tr_list, period)
-    smoothed_plus_dm = wilder_smooth(plus_dm_list, period)
-    smoothed_minus_dm = wilder_smooth(minus_dm_list, period)
+    Needs at least 2 * period bars. +DI/-DI[k] belong to bar k + period and
+    ADX[k] to bar k + 2 * period - 1.
+    """
+    # True Range: max of (H-L, |H-Cp|, |L-Cp|)
+    close_prev = c[:-1]
+    tr = np.maximum.reduce([
+        h[1:] - l[1:],
+        np.abs(h[1:] - close_prev),
+        np.abs(l[1:] - close_prev),
+    ])
     
-    if len(atr) == 0:
-        return None
+    # Directional Movement
+    # +DM = up_move if up_move > down_move AND up_move > 0, else 0
+    # -DM = down_move if down_move > up_move AND down_move > 0, else 0
+    up_move = h[1:] - h[:-1]
+    down_move = l[:-1] - l[1:]
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
     
-    # Calculate +DI and -DI for each smoothed period
-    plus_di_vals = []
-    minus_di_vals = []
+    # Apply Wilder's smoothing to TR, +DM, -DM
+    atr = wilder_smooth(tr, period)
+    smoothed_plus_dm = wilder_smooth(plus_dm, period)
+    smoothed_minus_dm = wilder_smooth(minus_dm, period)
     
-    for i in range(len(atr)):
-        if atr[i] > 0:
-            # DI = (DM / ATR) * 100
-            plus_di = (smoothed_plus_dm[i] / atr[i]) * 100
-            minus_di = (smoothed_minus_dm[i] / atr[i]) * 100
-        else:
-            plus_di = 0
-            minus_di = 0
-        
-        # Clamp DI values to [0, 100]
-        plus_di = max(0, min(100, plus_di))
-        minus_di = max(0, min(100, minus_di))
-        
-        plus_di_vals.append(plus_di)
-        minus_di_vals.append(minus_di)
+    # DI = (DM / ATR) * 100, clamped to [0, 100]; dividing by inf gives 0 where ATR is 0
+    safe_atr = np.where(atr > 0, atr, np.inf)
+    plus_di_vals = np.clip(smoothed_plus_dm / safe_atr * 100, 0, 100)
+    minus_di_vals = np.clip(smoothed_minus_dm / safe_atr * 100, 0, 100)
     
-    # Calculate DX for each period
     # DX = 100 * |+DI - -DI| / (+DI + -DI)
-    dx_list = []
-    for i in range(len(plus_di_vals)):
-        di_sum = plus_di_vals[i] + minus_di_vals[i]
-        if di_sum > 0:
-            dx = abs(plus_di_vals[i] - minus_di_vals[i]) / di_sum * 100
-        else:
-            dx = 0
-        dx_list.append(dx)
-    
-    if len(dx_list) < period:
-        return None
+    di_sum = plus_di_vals + minus_di_vals
+    has_di = di_sum > 0
+    dx_list = np.where(
+        has_di, np.abs(plus_di_vals - minus_di_vals) / np.where(has_di, di_sum, 1.0) * 100, 0.0
+    )
     
     # Calculate ADX: smoothed DX using Wilder's smoothing
     adx_vals = wilder_smooth(dx_list, period)
     
-    if len(adx_vals) == 0:
-        return None
+    return plus_di_vals, minus_di_vals, adx_vals
+
+
+def calculate_adx_series(
+    highs: List[Decimal],
+    lows: List[Decimal],
+    closes: List[Decimal],
+    period: int = 14
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ADX, +DI and -DI for every bar, in one vectorized pass.
+    
+    Element i is what calculate_adx returns for the first i + 1 bars, before
+    rounding; NaN during warmup (where calculate_adx would return None).
+    Use this instead of calling calculate_adx once per bar.
+    
+    Returns:
+        Tuple of (adx, plus_di, minus_di) float64 arrays, clamped to [0, 100]
+    """
+    h = as_float_array(highs)
+    l = as_float_array(lows)
+    c = as_float_array(closes)
+    n = len(h)
+    
+    adx = np.full(n, np.nan)
+    plus_di = np.full(n, np.nan)
+    minus_di = np.full(n, np.nan)
+    
+    start = period * 2
+    if n < start + 1:
+        return adx, plus_di, minus_di
     
-    # Get latest values
-    latest_adx_raw = adx_vals[-1]
-    latest_plus_di_raw = plus_di_vals[-1]
-    latest_minus_di_raw = minus_di_vals[-1]
+    plus_di_vals, minus_di_vals, adx_vals = _adx_arrays(h, l, c, period)
+    adx[start:] = np.clip(adx_vals[1:], 0, 100)
+    plus_di[start:] = plus_di_vals[period:]
+    minus_di[start:] = minus_di_vals[period:]
+    
+    return adx, plus_di, minus_di
+
+
+def calculate_adx_windowed(
+    highs: List[Decimal],
+    lows: List[Decimal],
+    closes: List[Decimal],
+    window: int,
+    period: int = 14
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ADX, +DI and -DI for every bar, each over only the last `window` bars.
     
+    Element i is what calculate_adx returns for bars i - window + 1 .. i
+    (fewer at the start), before rounding; NaN where that is too few bars.
+    This is what a caller keeping a bounded price history sees: Wilder's
+    smoothing restarts with every window, so unlike calculate_adx_series
+    each bar past the first full window needs its own pass.
+    
+    Returns:
+        Tuple of (adx, plus_di, minus_di) float64 arrays, clamped to [0, 100]
+    """
+    h = as_float_array(highs)
+    l = as_float_array(lows)
+    c = as_float_array(closes)
+    
+    # Until the window fills up it covers the whole history
+    adx, plus_di, minus_di = calculate_adx_series(h[:window], l[:window], c[:window], period)
+    n = len(h)
+    if n <= window:
+        return adx, plus_di, minus_di
+    
+    adx = np.concatenate([adx, np.full(n - window, np.nan)])
+    plus_di = np.concatenate([plus_di, np.full(n - window, np.nan)])
+    minus_di = np.concatenate([minus_di, np.full(n - window, np.nan)])
+    if window < period * 2 + 1:
+        return adx, plus_di, minus_di
+    
+    compiled = NUMBA_AVAILABLE or AOT_AVAILABLE
+    for i in range(window, n):
+        lo = i + 1 - window
+        if compiled:
+            adx_raw, plus_di[i], minus_di[i] = adx_fused(h[lo:i + 1], l[lo:i + 1], c[lo:i + 1], period)
+        else:
+            plus_di_vals, minus_di_vals, adx_vals = _adx_arrays(h[lo:i + 1], l[lo:i + 1], c[lo:i + 1], period)
+            adx_raw, plus_di[i], minus_di[i] = adx_vals[-1], plus_di_vals[-1], minus_di_vals[-1]
+        adx[i] = max(0.0, min(100.0, adx_raw))
+    
+    return adx, plus_di, minus_di
+
+
+def _format_adx(
+    latest_adx_raw: float,
+    latest_plus_di_raw: float,
+    latest_minus_di_raw: float
+) -> Tuple[Decimal, Decimal, Decimal]:
+    """Clamp the latest ADX/+DI/-DI to [0, 100] (logging if needed) and round them."""
     # Clamp final values to [0, 100] and log if we needed to clamp
     latest_adx = max(0, min(100, latest_adx_raw))
     latest_plus_di = max(0, min(100, latest_plus_di_raw))
@@ -183,6 +244,91 @@ def calculate_adx(
     )
 
 
+class ADXState:
+    """
+    Streaming ADX, updated in O(1) per bar.
+    
+    Feeding bars one at a time gives the same values as calculate_adx over
+    all the bars seen so far (Wilder's smoothing from the first bar), without
+    rescanning the history on every new bar.
+    """
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._bars = 0
+        self._prev: Optional[Tuple[float, float, float]] = None
+        # Sums of the first `period` values while warming up, smoothed values after
+        self._atr = 0.0
+        self._plus_dm = 0.0
+        self._minus_dm = 0.0
+        self._dx_count = 0
+        self._adx = 0.0
+    
+    def update(self, high, low, close) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
+        """
+        Add a bar.
+        
+        Returns:
+            Tuple of (adx, plus_di, minus_di) as calculate_adx would return for
+            the bars so far, or None while there is insufficient data
+        """
+        high, low, close = float(high), float(low), float(close)
+        prev = self._prev
+        self._prev = (high, low, close)
+        self._bars += 1
+        if prev is None:
+            return None
+        
+        high_prev, low_prev, close_prev = prev
+        period = self.period
+        
+        tr = max(high - low, abs(high - close_prev), abs(low - close_prev))
+        up_move = high - high_prev
+        down_move = low_prev - low
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        
+        # TR and DM: SMA of the first `period` moves, then Wilder's smoothing
+        moves = self._bars - 1
+        if moves <= period:
+            self._atr += tr
+            self._plus_dm += plus_dm
+            self._minus_dm += minus_dm
+            if moves < period:
+                return None
+            self._atr /= period
+            self._plus_dm /= period
+            self._minus_dm /= period
+        else:
+            self._atr = (self._atr * (period - 1) + tr) / period
+            self._plus_dm = (self._plus_dm * (period - 1) + plus_dm) / period
+            self._minus_dm = (self._minus_dm * (period - 1) + minus_dm) / period
+        
+        if self._atr > 0:
+            plus_di = max(0.0, min(100.0, self._plus_dm / self._atr * 100))
+            minus_di = max(0.0, min(100.0, self._minus_dm / self._atr * 100))
+        else:
+            plus_di = minus_di = 0.0
+        
+        di_sum = plus_di + minus_di
+        dx = abs(plus_di - minus_di) / di_sum * 100 if di_sum > 0 else 0.0
+        
+        # ADX: the same smoothing, over DX
+        self._dx_count += 1
+        if self._dx_count <= period:
+            self._adx += dx
+            if self._dx_count < period:
+                return None
+            self._adx /= period
+        else:
+            self._adx = (self._adx * (period - 1) + dx) / period
+        
+        if self._bars < period * 2 + 1:
+            return None
+        
+        return _format_adx(self._adx, plus_di, minus_di)
+
+
 def get_trend_direction(adx: Decimal, plus_di: Decimal, minus_di: Decimal, 
                         threshold: Decimal = Decimal("25")) -> str:
     """
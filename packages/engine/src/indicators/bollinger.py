@@ -11,9 +11,19 @@ Band width indicates volatility:
 - Wide bands = high volatility
 """
 from decimal import Decimal
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+import os
+import sys
 import math
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.kernels import as_float_array
+
 
 def calculate_bollinger_bands(
     closes: List[Decimal],
@@ -34,16 +44,59 @@ def calculate_bollinger_bands(
     if len(closes) < period:
         return None
     
-    # Get the most recent 'period' closes
-    recent_closes = [float(c) for c in closes[-period:]]
+    # Get the most recent 'period' closes (only these are converted)
+    recent_closes = as_float_array(closes[-period:])
     
     # Calculate SMA (middle band)
-    sma = sum(recent_closes) / period
+    sma = float(recent_closes.mean())
+    
+    # Calculate (population) standard deviation
+    std_dev = float(recent_closes.std())
+    
+    return _format_bands(sma, std_dev, num_std)
+
+
+def calculate_bollinger_series(
+    closes: List[Decimal],
+    period: int = 20,
+    num_std: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bollinger Bands for every bar, in one vectorized pass.
     
-    # Calculate standard deviation
-    variance = sum((c - sma) ** 2 for c in recent_closes) / period
-    std_dev = math.sqrt(variance)
+    Element i is what calculate_bollinger_bands returns for the first i + 1
+    closes, before rounding; NaN during warmup (where calculate_bollinger_bands
+    would return None). Use this instead of calling calculate_bollinger_bands
+    once per bar.
     
+    Returns:
+        Tuple of (upper, middle, lower, width) float64 arrays
+    """
+    arr = as_float_array(closes)
+    n = len(arr)
+    upper = np.full(n, np.nan)
+    middle = np.full(n, np.nan)
+    lower = np.full(n, np.nan)
+    width = np.full(n, np.nan)
+    if n < period:
+        return upper, middle, lower, width
+    
+    # Row k is the window of closes k .. k + period - 1 (a view, no copy)
+    windows = sliding_window_view(arr, period)
+    sma = windows.mean(axis=-1)
+    std_dev = windows.std(axis=-1)
+    
+    middle[period - 1:] = sma
+    upper[period - 1:] = sma + (num_std * std_dev)
+    lower[period - 1:] = sma - (num_std * std_dev)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        width[period - 1:] = np.where(sma > 0, (upper[period - 1:] - lower[period - 1:]) / sma * 100, 0.0)
+    
+    return upper, middle, lower, width
+
+
+def _format_bands(sma: float, std_dev: float, num_std: float) -> Tuple[Decimal, Decimal, Decimal, Decimal]:
+    """Bands and bandwidth from the SMA and standard deviation, rounded."""
     # Calculate bands
     upper = sma + (num_std * std_dev)
     lower = sma - (num_std * std_dev)
@@ -59,6 +112,52 @@ def calculate_bollinger_bands(
     )
 
 
+class BollingerState:
+    """
+    Streaming Bollinger Bands, updated in O(1) per close.
+    
+    Keeps the last `period` closes with their running mean and sum of
+    squared deviations (Welford's update, sliding the window by swapping
+    the oldest close for the newest), so no window is rescanned. Values
+    match calculate_bollinger_bands up to floating-point rounding.
+    """
+    
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self._window: Deque[float] = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+    
+    def update(self, close) -> Optional[Tuple[Decimal, Decimal, Decimal, Decimal]]:
+        """
+        Add a close.
+        
+        Returns:
+            Tuple of (upper, middle, lower, width) for the last `period`
+            closes, or None while there is insufficient data
+        """
+        x = float(close)
+        window = self._window
+        
+        if len(window) < self.period:
+            window.append(x)
+            delta = x - self._mean
+            self._mean += delta / len(window)
+            self._m2 += delta * (x - self._mean)
+            if len(window) < self.period:
+                return None
+        else:
+            oldest = window.popleft()
+            window.append(x)
+            prev_mean = self._mean
+            self._mean += (x - oldest) / self.period
+            self._m2 += (x - oldest) * (x - self._mean + oldest - prev_mean)
+        
+        std_dev = math.sqrt(max(self._m2, 0.0) / self.period)
+        return _format_bands(self._mean, std_dev, self.num_std)
+
+
 def get_band_position(price: Decimal, upper: Decimal, middle: Decimal, 
                       lower: Decimal) -> str:
     """
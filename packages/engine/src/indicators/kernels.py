@@ -0,0 +1,157 @@
+"""
+Compiled indicator kernels.
+
+Scalar recurrences that NumPy cannot vectorize (Wilder's smoothing feeds
+each value into the next), written as plain loops over float64 arrays.
+They run Numba-compiled when Numba is installed, and as plain Python
+otherwise. When the ahead-of-time build (indicators._kernels_aot) has been
+run, the precompiled extension is used instead and no JIT warmup is paid.
+
+Indicators convert their (Decimal) inputs once with as_float_array and stay
+in float64 until they build their results.
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jit import njit
+
+
+def as_float_array(values) -> np.ndarray:
+    """Convert prices (Decimal, float or an array) to a float64 array in one pass."""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.float64, copy=False)
+    return np.fromiter(map(float, values), np.float64, count=len(values))
+
+
+@njit(cache=True)
+def wilder_smooth_loop(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder's smoothing (RMA) of a float64 array with at least `period` values.
+    
+    out[0] is the SMA of the first `period` values; after that
+    out[k] = (out[k-1] * (period-1) + values[k+period-1]) / period.
+    """
+    n = values.shape[0]
+    out = np.empty(n - period + 1)
+    
+    total = 0.0
+    for i in range(period):
+        total += values[i]
+    out[0] = total / period
+    
+    for i in range(period, n):
+        out[i - period + 1] = (out[i - period] * (period - 1) + values[i]) / period
+    
+    return out
+
+
+@njit(cache=True)
+def adx_fused(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int):
+    """
+    Latest ADX, +DI and -DI in a single pass over the bars, with no temporaries.
+    
+    Same arithmetic as the array path of calculate_adx (TR/+DM/-DM, Wilder's
+    smoothing seeded with the SMA of the first `period` values, DI clamped to
+    [0, 100], DX, then ADX as the smoothed DX), with every intermediate held
+    in a scalar. Needs at least 2 * period bars.
+    """
+    n = high.shape[0]
+    atr = 0.0
+    plus_dm_s = 0.0
+    minus_dm_s = 0.0
+    adx = 0.0
+    plus_di = 0.0
+    minus_di = 0.0
+    dx_count = 0
+    
+    for i in range(1, n):
+        tr = high[i] - low[i]
+        hc = abs(high[i] - close[i - 1])
+        lc = abs(low[i] - close[i - 1])
+        if hc > tr:
+            tr = hc
+        if lc > tr:
+            tr = lc
+        
+        up_move = high[i] - high[i - 1]
+        down_move = low[i - 1] - low[i]
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        
+        # TR and DM: sums of the first `period` moves, then Wilder's smoothing
+        if i <= period:
+            atr += tr
+            plus_dm_s += plus_dm
+            minus_dm_s += minus_dm
+            if i < period:
+                continue
+            atr /= period
+            plus_dm_s /= period
+            minus_dm_s /= period
+        else:
+            atr = (atr * (period - 1) + tr) / period
+            plus_dm_s = (plus_dm_s * (period - 1) + plus_dm) / period
+            minus_dm_s = (minus_dm_s * (period - 1) + minus_dm) / period
+        
+        if atr > 0:
+            plus_di = min(100.0, max(0.0, plus_dm_s / atr * 100))
+            minus_di = min(100.0, max(0.0, minus_dm_s / atr * 100))
+        else:
+            plus_di = 0.0
+            minus_di = 0.0
+        
+        di_sum = plus_di + minus_di
+        dx = abs(plus_di - minus_di) / di_sum * 100 if di_sum > 0 else 0.0
+        
+        # ADX: the same smoothing, over DX
+        dx_count += 1
+        if dx_count <= period:
+            adx += dx
+            if dx_count == period:
+                adx /= period
+        else:
+            adx = (adx * (period - 1) + dx) / period
+    
+    return adx, plus_di, minus_di
+
+
+
+@njit(cache=True)
+def rsi_averages(close: np.ndarray, period: int):
+    """
+    Latest Wilder-smoothed average gain and loss, in a single pass over the closes.
+    
+    Same arithmetic as calculate_rsi's array path (SMA of the first `period`
+    gains/losses, then Wilder's smoothing) without the change, gain and loss
+    arrays. Needs at least period + 1 closes.
+    """
+    n = close.shape[0]
+    avg_gain = 0.0
+    avg_loss = 0.0
+    
+    for i in range(1, n):
+        change = close[i] - close[i - 1]
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        
+        if i <= period:
+            avg_gain += gain
+            avg_loss += loss
+            if i == period:
+                avg_gain /= period
+                avg_loss /= period
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+    
+    return avg_gain, avg_loss
+
+# Prefer the ahead-of-time build (python -m indicators._kernels_aot) when present
+try:
+    from indicators._ind_kernels import wilder_smooth_loop, adx_fused, rsi_averages
+    AOT_AVAILABLE = True
+except ImportError:
+    AOT_AVAILABLE = False
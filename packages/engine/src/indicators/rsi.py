@@ -7,7 +7,15 @@ RSI measures momentum and speed of price movements.
 """
 from decimal import Decimal
 from typing import List, Optional
-import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators.kernels import as_float_array, rsi_averages, wilder_smooth_loop, AOT_AVAILABLE
+from utils.jit import NUMBA_AVAILABLE
 
 
 def calculate_rsi(
@@ -27,32 +35,59 @@ def calculate_rsi(
     if len(closes) < period + 1:
         return None
     
-    # Calculate price changes
-    changes = []
-    for i in range(1, len(closes)):
-        change = float(closes[i]) - float(closes[i-1])
-        changes.append(change)
+    arr = as_float_array(closes)
+    
+    if NUMBA_AVAILABLE or AOT_AVAILABLE:
+        # One compiled pass, no change/gain/loss arrays
+        return _format_rsi(*rsi_averages(arr, period))
+    
+    # Price changes, split into gains and losses
+    changes = np.diff(arr)
     
     if len(changes) < period:
         return None
     
-    # First average gain/loss
-    gains = [c if c > 0 else 0 for c in changes[:period]]
-    losses = [-c if c < 0 else 0 for c in changes[:period]]
+    gains = np.where(changes > 0, changes, 0.0)
+    losses = np.where(changes < 0, -changes, 0.0)
     
-    avg_gain = sum(gains) / period
-    avg_loss = sum(losses) / period
+    # Wilder's smoothing (seeded with the first `period` averages)
+    avg_gain = float(wilder_smooth_loop(gains, period)[-1])
+    avg_loss = float(wilder_smooth_loop(losses, period)[-1])
     
-    # Wilder's smoothing for remaining periods
-    for i in range(period, len(changes)):
-        change = changes[i]
-        gain = change if change > 0 else 0
-        loss = -change if change < 0 else 0
-        
-        avg_gain = ((avg_gain * (period - 1)) + gain) / period
-        avg_loss = ((avg_loss * (period - 1)) + loss) / period
+    return _format_rsi(avg_gain, avg_loss)
+
+
+def calculate_rsi_series(closes: List[Decimal], period: int = 14) -> np.ndarray:
+    """
+    RSI for every bar, in one vectorized pass.
+    
+    Element i is what calculate_rsi returns for the first i + 1 closes,
+    before rounding; NaN during warmup (where calculate_rsi would return
+    None). Use this instead of calling calculate_rsi once per bar.
+    
+    Returns:
+        float64 array of RSI values (0-100)
+    """
+    arr = as_float_array(closes)
+    n = len(arr)
+    rsi = np.full(n, np.nan)
+    if n < period + 1:
+        return rsi
+    
+    changes = np.diff(arr)
+    avg_gain = wilder_smooth_loop(np.where(changes > 0, changes, 0.0), period)
+    avg_loss = wilder_smooth_loop(np.where(changes < 0, -changes, 0.0), period)
     
-    # Calculate RSI
+    # Averages [k] belong to close k + period; RSI is 100 where there are no losses
+    has_loss = avg_loss != 0
+    rs = avg_gain / np.where(has_loss, avg_loss, 1.0)
+    rsi[period:] = np.where(has_loss, 100 - (100 / (1 + rs)), 100.0)
+    
+    return rsi
+
+
+def _format_rsi(avg_gain: float, avg_loss: float) -> Decimal:
+    """RSI from the smoothed average gain and loss, rounded."""
     if avg_loss == 0:
         return Decimal("100")
     
@@ -62,6 +97,56 @@ def calculate_rsi(
     return Decimal(str(round(rsi, 2)))
 
 
+class RSIState:
+    """
+    Streaming RSI, updated in O(1) per close.
+    
+    Feeding closes one at a time gives the same values as calculate_rsi over
+    all the closes seen so far, without rescanning the history.
+    """
+    
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close: Optional[float] = None
+        self._changes = 0
+        # Sums of the first `period` gains/losses while warming up, averages after
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+    
+    def update(self, close) -> Optional[Decimal]:
+        """
+        Add a close.
+        
+        Returns:
+            RSI as calculate_rsi would return for the closes so far, or None
+            while there is insufficient data
+        """
+        close = float(close)
+        prev = self._prev_close
+        self._prev_close = close
+        if prev is None:
+            return None
+        
+        change = close - prev
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        period = self.period
+        
+        self._changes += 1
+        if self._changes <= period:
+            self._avg_gain += gain
+            self._avg_loss += loss
+            if self._changes < period:
+                return None
+            self._avg_gain /= period
+            self._avg_loss /= period
+        else:
+            self._avg_gain = ((self._avg_gain * (period - 1)) + gain) / period
+            self._avg_loss = ((self._avg_loss * (period - 1)) + loss) / period
+        
+        return _format_rsi(self._avg_gain, self._avg_loss)
+
+
 def is_overbought(rsi: Decimal, threshold: Decimal = Decimal("70")) -> bool:
     """Check if RSI indicates overbought conditions."""
     return rsi >= threshold
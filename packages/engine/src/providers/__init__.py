@@ -1,17 +1,22 @@
 # Providers module
-from .polymarket_gamma import (
-    discover_active_markets,
-    fetch_events,
-    fetch_markets,
-    extract_market_info,
-)
-from .polymarket_clob import (
-    fetch_orderbook,
-    get_mid_price,
-    get_spread,
-    calculate_mid_price,
-    fetch_mid_prices_batch,
-)
+#
+# The API clients pull in requests (and start HTTP sessions) on import, so
+# they are loaded on first attribute access rather than with the package.
+import importlib
+
+_LAZY = {
+    # Gamma API
+    "discover_active_markets": "polymarket_gamma",
+    "fetch_events": "polymarket_gamma",
+    "fetch_markets": "polymarket_gamma",
+    "extract_market_info": "polymarket_gamma",
+    # CLOB API
+    "fetch_orderbook": "polymarket_clob",
+    "get_mid_price": "polymarket_clob",
+    "get_spread": "polymarket_clob",
+    "calculate_mid_price": "polymarket_clob",
+    "fetch_mid_prices_batch": "polymarket_clob",
+}
 
 __all__ = [
     # Gamma API
@@ -26,3 +31,16 @@ __all__ = [
     "calculate_mid_price",
     "fetch_mid_prices_batch",
 ]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -7,36 +7,56 @@ https://clob.polymarket.com
 Used to get current mid prices for prediction market outcomes.
 """
 import os
+import sys
 import time
+import random
 import logging
-import json
+import orjson
 import requests
-from typing import Dict, Any, List, Optional, Tuple
-from decimal import Decimal
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from decimal import Decimal, InvalidOperation
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import TokenBucket
+from utils.cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 CLOB_API_URL = "https://clob.polymarket.com"
 REQUEST_TIMEOUT = 10
-RATE_LIMIT_DELAY = 0.3  # Conservative delay
-last_request_time = 0
 
-# Cache settings (simple in-memory cache)
-_price_cache: Dict[str, Tuple[float, Decimal]] = {}  # token_id -> (timestamp, mid_price)
-_orderbook_cache: Dict[str, Tuple[float, Dict]] = {}  # token_id -> (timestamp, orderbook)
+# Valid mid price range
+MIN_PRICE = Decimal("0.01")
+MAX_PRICE = Decimal("0.99")
+
+# Rate limiting: conservative sustained rate, small bursts for concurrent fetches
+REQUEST_RATE = 3.0  # Requests per second
+REQUEST_BURST = 8
+MAX_CONCURRENT_REQUESTS = 8
+MAX_BACKOFF_SECONDS = 30.0
+_limiter = TokenBucket(REQUEST_RATE, REQUEST_BURST)
+
+# Shared session: keeps CLOB API connections alive between calls
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_REQUESTS))
+
+# Cache settings (bounded in-memory caches, entries expire after the TTL)
 CACHE_TTL_SECONDS = 30  # Cache prices for 30 seconds
+CACHE_MAX_ENTRIES = 4096
+_price_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)  # token_id -> mid_price
+_orderbook_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)  # token_id -> orderbook
+
+
+def _backoff_delay(base_delay: float, attempt: int) -> float:
+    """Exponential backoff with full jitter, so concurrent callers don't retry in lockstep."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, base_delay * (2 ** attempt)))
 
 
 def _make_request(endpoint: str, params: Dict = None) -> Optional[Dict]:
-    """Make a rate-limited request to CLOB API."""
-    global last_request_time
-    
-    # Rate limiting
-    elapsed = time.time() - last_request_time
-    if elapsed < RATE_LIMIT_DELAY:
-        time.sleep(RATE_LIMIT_DELAY - elapsed)
-    
+    """Make a rate-limited request to CLOB API (safe to call from several threads)."""
     url = f"{CLOB_API_URL}{endpoint}"
     
     max_retries = 3
@@ -44,8 +64,8 @@ def _make_request(endpoint: str, params: Dict = None) -> Optional[Dict]:
     
     for attempt in range(max_retries):
         try:
-            last_request_time = time.time()
-            response = requests.get(
+            _limiter.acquire()
+            response = _session.get(
                 url,
                 params=params,
                 timeout=REQUEST_TIMEOUT
@@ -54,21 +74,22 @@ def _make_request(endpoint: str, params: Dict = None) -> Optional[Dict]:
             if response.status_code == 429:
                 retry_after = int(response.headers.get("Retry-After", 30))
                 logger.warning(f"CLOB API rate limited, waiting {retry_after}s")
-                time.sleep(retry_after)
+                # Pause the shared limiter so every thread backs off, not just this one
+                _limiter.pause(retry_after)
                 continue
             
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
             
         except requests.exceptions.Timeout:
             logger.warning(f"CLOB API timeout (attempt {attempt + 1})")
             if attempt < max_retries - 1:
-                time.sleep(base_delay * (2 ** attempt))
+                time.sleep(_backoff_delay(base_delay, attempt))
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"CLOB API error: {e}")
             if attempt < max_retries - 1:
-                time.sleep(base_delay * (2 ** attempt))
+                time.sleep(_backoff_delay(base_delay, attempt))
     
     return None
 
@@ -82,26 +103,46 @@ def fetch_orderbook(token_id: str, use_cache: bool = True) -> Optional[Dict]:
         use_cache: Whether to use cached data
     
     Returns:
-        Orderbook dict with 'bids' and 'asks' lists
+        Orderbook dict with 'bids' and 'asks' lists, plus '_tob':
+        the parsed (best_bid, best_ask) Decimals (None for an empty side)
     """
-    now = time.time()
-    
     # Check cache
-    if use_cache and token_id in _orderbook_cache:
-        cache_time, cached_book = _orderbook_cache[token_id]
-        if now - cache_time < CACHE_TTL_SECONDS:
+    if use_cache:
+        cached_book = _orderbook_cache.get(token_id)
+        if cached_book is not None:
             return cached_book
     
     # Fetch from API
     data = _make_request("/book", {"token_id": token_id})
     
     if data:
-        _orderbook_cache[token_id] = (now, data)
+        # Parse the top of book once per response; cached readers reuse it
+        data["_tob"] = (_top_price(data.get("bids")), _top_price(data.get("asks")))
+        _orderbook_cache.set(token_id, data)
         return data
     
     return None
 
 
+def _top_price(levels: List[Dict]) -> Optional[Decimal]:
+    """Price of the first level of one side of the book, or None if missing/invalid."""
+    if not levels:
+        return None
+    try:
+        # The API sends prices as decimal strings: parse them directly
+        return Decimal(levels[0]["price"])
+    except (KeyError, TypeError, InvalidOperation):
+        return None
+
+
+def _top_of_book(orderbook: Dict) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+    """(best_bid, best_ask), precomputed by fetch_orderbook when available."""
+    tob = orderbook.get("_tob")
+    if tob is None:
+        tob = (_top_price(orderbook.get("bids")), _top_price(orderbook.get("asks")))
+    return tob
+
+
 def calculate_mid_price(orderbook: Dict) -> Optional[Decimal]:
     """
     Calculate mid price from orderbook.
@@ -115,25 +156,8 @@ def calculate_mid_price(orderbook: Dict) -> Optional[Decimal]:
     Returns:
         Mid price as Decimal (0-1 scale) or None
     """
-    bids = orderbook.get("bids", [])
-    asks = orderbook.get("asks", [])
-    
-    best_bid = None
-    best_ask = None
-    
-    if bids:
-        # Bids are sorted by price descending, first is best
-        try:
-            best_bid = Decimal(str(bids[0].get("price", 0)))
-        except (KeyError, ValueError):
-            pass
-    
-    if asks:
-        # Asks are sorted by price ascending, first is best
-        try:
-            best_ask = Decimal(str(asks[0].get("price", 0)))
-        except (KeyError, ValueError):
-            pass
+    # Bids are sorted by price descending, asks ascending: first is best
+    best_bid, best_ask = _top_of_book(orderbook)
     
     if best_bid is not None and best_ask is not None:
         # Normal case: both sides available
@@ -149,7 +173,7 @@ def calculate_mid_price(orderbook: Dict) -> Optional[Decimal]:
         return None
     
     # Ensure price is in valid range
-    mid = max(Decimal("0.01"), min(Decimal("0.99"), mid))
+    mid = max(MIN_PRICE, min(MAX_PRICE, mid))
     
     return mid
 
@@ -165,12 +189,10 @@ def get_mid_price(token_id: str, use_cache: bool = True) -> Optional[Decimal]:
     Returns:
         Mid price as Decimal (0-1 scale) or None
     """
-    now = time.time()
-    
     # Check cache
-    if use_cache and token_id in _price_cache:
-        cache_time, cached_price = _price_cache[token_id]
-        if now - cache_time < CACHE_TTL_SECONDS:
+    if use_cache:
+        cached_price = _price_cache.get(token_id)
+        if cached_price is not None:
             return cached_price
     
     # Fetch orderbook and calculate mid
@@ -179,7 +201,7 @@ def get_mid_price(token_id: str, use_cache: bool = True) -> Optional[Decimal]:
     if orderbook:
         mid = calculate_mid_price(orderbook)
         if mid is not None:
-            _price_cache[token_id] = (now, mid)
+            _price_cache.set(token_id, mid)
             return mid
     
     return None
@@ -192,40 +214,32 @@ def get_spread(orderbook: Dict) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
     Returns:
         Tuple of (spread, bid, ask) or None if insufficient liquidity
     """
-    bids = orderbook.get("bids", [])
-    asks = orderbook.get("asks", [])
-    
-    if not bids or not asks:
+    best_bid, best_ask = _top_of_book(orderbook)
+    if best_bid is None or best_ask is None:
         return None
     
-    try:
-        best_bid = Decimal(str(bids[0].get("price", 0)))
-        best_ask = Decimal(str(asks[0].get("price", 0)))
-        spread = best_ask - best_bid
-        return (spread, best_bid, best_ask)
-    except (KeyError, ValueError):
-        return None
+    spread = best_ask - best_bid
+    return (spread, best_bid, best_ask)
 
 
 def fetch_mid_prices_batch(token_ids: List[str]) -> Dict[str, Optional[Decimal]]:
     """
     Fetch mid prices for multiple tokens.
     
+    Tokens are fetched concurrently on the shared session; the token bucket
+    keeps the overall request rate in check.
+    
     Args:
         token_ids: List of token IDs
     
     Returns:
         Dict mapping token_id -> mid_price
     """
-    results = {}
-    
-    for token_id in token_ids:
-        price = get_mid_price(token_id)
-        results[token_id] = price
-        # Small delay to avoid rate limiting
-        time.sleep(0.1)
+    if not token_ids:
+        return {}
     
-    return results
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(token_ids))) as pool:
+        return dict(zip(token_ids, pool.map(get_mid_price, token_ids)))
 
 
 if __name__ == "__main__":
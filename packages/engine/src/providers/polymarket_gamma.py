@@ -7,65 +7,86 @@ https://gamma-api.polymarket.com
 Used to discover active prediction markets and their metadata.
 """
 import os
-import time
-import json
+import sys
+import atexit
 import logging
+import orjson
 import requests
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limit import TokenBucket
+from utils.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 GAMMA_API_URL = "https://gamma-api.polymarket.com"
 REQUEST_TIMEOUT = 10
-RATE_LIMIT_DELAY = 0.5  # Conservative delay between requests
-last_request_time = 0
+
+# Rate limiting: 2 requests/second sustained, bursts of up to 5
+REQUEST_RATE = 2.0  # Requests per second
+REQUEST_BURST = 5
+MAX_CONCURRENT_REQUESTS = 5
+_limiter = TokenBucket(REQUEST_RATE, REQUEST_BURST)
+
+# Shared session: keeps Gamma API connections alive between calls and retries
+# failed GETs (up to 3 retries, exponential backoff)
+_retry = Retry(
+    total=3,
+    backoff_factor=1,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods={"GET"},
+    respect_retry_after_header=True,
+)
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_retry))
+atexit.register(_session.close)
+
+# Response cache (bounded, in memory): GAMMA_CACHE_TTL seconds, 0 disables
+CACHE_TTL_SECONDS = float(os.getenv("GAMMA_CACHE_TTL", "60"))
+CACHE_MAX_ENTRIES = 256
+_response_cache = TTLCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)  # (endpoint, params) -> decoded JSON
 
 
 def _make_request(endpoint: str, params: Dict = None) -> Optional[Dict]:
-    """Make a rate-limited request to Gamma API."""
-    global last_request_time
-    
-    # Rate limiting
-    elapsed = time.time() - last_request_time
-    if elapsed < RATE_LIMIT_DELAY:
-        time.sleep(RATE_LIMIT_DELAY - elapsed)
+    """
+    Make a rate-limited request to Gamma API (safe to call from several threads).
     
+    Timeouts, 429s and 5xx responses are retried with backoff by the
+    session's adapter (honouring Retry-After). Responses are cached for
+    CACHE_TTL_SECONDS and shared between callers; treat them as read-only.
+    """
     url = f"{GAMMA_API_URL}{endpoint}"
     
-    max_retries = 3
-    base_delay = 1
+    # Repeated CLI / backtest runs re-request the same pages: serve those from memory
+    cache_key = (endpoint, tuple(sorted(params.items())) if params else ())
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    for attempt in range(max_retries):
-        try:
-            last_request_time = time.time()
-            response = requests.get(
-                url,
-                params=params,
-                timeout=REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 60))
-                logger.warning(f"Gamma API rate limited, waiting {retry_after}s")
-                time.sleep(retry_after)
-                continue
-            
-            response.raise_for_status()
-            return response.json()
-            
-        except requests.exceptions.Timeout:
-            logger.warning(f"Gamma API timeout (attempt {attempt + 1})")
-            if attempt < max_retries - 1:
-                time.sleep(base_delay * (2 ** attempt))
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Gamma API error: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(base_delay * (2 ** attempt))
+    _limiter.acquire()
+    try:
+        response = _session.get(
+            url,
+            params=params,
+            timeout=REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+        
+    except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+        logger.error(f"Gamma API error: {e}")
+        return None
     
-    return None
+    if CACHE_TTL_SECONDS > 0:
+        _response_cache.set(cache_key, data)
+    return data
 
 
 def fetch_events(
@@ -134,45 +155,92 @@ def extract_market_info(market: Dict) -> Dict[str, Any]:
     - token_ids: CLOB token IDs for each outcome
     - active: Whether market is active
     """
+    get = market.get
+    
     # Get token IDs - handle different field names and formats
-    token_ids = market.get("clobTokenIds") or market.get("clob_token_ids") or []
+    token_ids = get("clobTokenIds") or get("clob_token_ids") or []
     
     # Token IDs may be a JSON string or already a list
     if isinstance(token_ids, str):
         try:
-            token_ids = json.loads(token_ids)
-        except (json.JSONDecodeError, ValueError):
+            token_ids = orjson.loads(token_ids)
+        except orjson.JSONDecodeError:
             token_ids = []
     
     # If still empty, check tokens array
-    if not token_ids and isinstance(market.get("tokens"), list):
-        token_ids = [t.get("token_id") or t.get("clobTokenId") for t in market["tokens"] if t]
+    if not token_ids:
+        tokens = get("tokens")
+        if isinstance(tokens, list):
+            token_ids = [t.get("token_id") or t.get("clobTokenId") for t in tokens if t]
     
-    # Clean up token IDs
-    token_ids = [str(tid) for tid in token_ids if tid]
+    # Event fields come from the first embedded event when there is one
+    events = get("events")
+    if events:
+        event = events[0]
+        event_id = event.get("id")
+        event_slug = event.get("slug")
+    else:
+        event_id = get("event_id")
+        event_slug = get("event_slug")
     
     return {
-        "market_id": str(market.get("id") or market.get("conditionId", "")),
-        "question": market.get("question"),
-        "slug": market.get("slug"),
-        "outcomes": market.get("outcomes", []),
-        "outcome_prices": market.get("outcomePrices") or market.get("outcome_prices", []),
-        "token_ids": token_ids,
-        "active": market.get("active", True),
-        "closed": market.get("resolved") or market.get("closed", False),
-        "end_date": market.get("endDateIso") or market.get("end_date_iso"),
-        "volume": market.get("volume") or market.get("volumeNum"),
-        "event_id": market.get("events", [{}])[0].get("id") if market.get("events") else market.get("event_id"),
-        "event_slug": market.get("events", [{}])[0].get("slug") if market.get("events") else market.get("event_slug"),
-        "image": market.get("image"),
-        "description": market.get("description"),
+        "market_id": str(get("id") or get("conditionId", "")),
+        "question": get("question"),
+        "slug": get("slug"),
+        "outcomes": get("outcomes", []),
+        "outcome_prices": get("outcomePrices") or get("outcome_prices", []),
+        "token_ids": [str(tid) for tid in token_ids if tid],
+        "active": get("active", True),
+        "closed": get("resolved") or get("closed", False),
+        "end_date": get("endDateIso") or get("end_date_iso"),
+        "volume": get("volume") or get("volumeNum"),
+        "event_id": event_id,
+        "event_slug": event_slug,
+        "image": get("image"),
+        "description": get("description"),
+    }
+
+
+def _fetch_market_page(offset: int, limit: int) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    One page of active markets from the /markets endpoint (which has clobTokenIds).
+    
+    Markets are reduced with extract_market_info in the fetching thread, so
+    the raw page is released as soon as it arrives rather than held until
+    the caller gets to it.
+    
+    Returns:
+        Tuple of (markets on the page, info dicts of those with token IDs),
+        or None if the request failed
+    """
+    params = {
+        "limit": limit,
+        "offset": offset,
+        "active": "true",
+        "closed": "false"
     }
+    
+    data = _make_request("/markets", params)
+    if not isinstance(data, list):
+        return None
+    
+    markets = []
+    for market in data:
+        market_info = extract_market_info(market)
+        if market_info["market_id"] and market_info.get("token_ids"):
+            markets.append(market_info)
+    return len(data), markets
 
 
 def discover_active_markets(max_markets: int = 500) -> List[Dict[str, Any]]:
     """
     Discover all active markets by fetching directly from /markets endpoint.
     
+    The pages needed to reach max_markets are fetched concurrently (the
+    token bucket keeps the overall request rate in check) and processed in
+    order; more pages are fetched only if markets without token IDs left
+    the result short.
+    
     Args:
         max_markets: Maximum number of markets to fetch
     
@@ -182,35 +250,28 @@ def discover_active_markets(max_markets: int = 500) -> List[Dict[str, Any]]:
     all_markets = []
     offset = 0
     limit = 100
+    done = False
     
-    while len(all_markets) < max_markets:
-        logger.info(f"Fetching markets offset={offset}, total={len(all_markets)}")
-        
-        # Use /markets endpoint which has clobTokenIds
-        params = {
-            "limit": limit,
-            "offset": offset,
-            "active": "true",
-            "closed": "false"
-        }
-        
-        data = _make_request("/markets", params)
-        
-        if not data or not isinstance(data, list):
-            break
-        
-        for market in data:
-            market_info = extract_market_info(market)
-            if market_info["market_id"] and market_info.get("token_ids"):
-                all_markets.append(market_info)
-        
-        offset += limit
-        
-        if len(data) < limit:
-            break
-        
-        if len(all_markets) >= max_markets:
-            break
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        while not done and len(all_markets) < max_markets:
+            # Enough pages for the remainder, if every market has token IDs
+            pages = -(-(max_markets - len(all_markets)) // limit)
+            offsets = range(offset, offset + pages * limit, limit)
+            logger.info(f"Fetching markets offset={offset}, pages={pages}, total={len(all_markets)}")
+            
+            for page in pool.map(lambda page_offset: _fetch_market_page(page_offset, limit), offsets):
+                if not page or not page[0]:
+                    done = True
+                    break
+                
+                page_size, markets = page
+                all_markets.extend(markets)
+                
+                if page_size < limit or len(all_markets) >= max_markets:
+                    done = True
+                    break
+            
+            offset += pages * limit
     
     logger.info(f"Discovered {len(all_markets)} active markets with token IDs")
     return all_markets[:max_markets]
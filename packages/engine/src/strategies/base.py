@@ -1,9 +1,15 @@
 """Strategy base classes and interfaces."""
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import ClassVar, Dict, List, Optional, Any, Tuple, Union
 from decimal import Decimal
 from dataclasses import dataclass
 from enum import Enum
+import math
+
+import numpy as np
+
+# Numeric fields are float in backtests and Decimal in live trading
+Number = Union[float, Decimal]
 
 
 class SignalType(Enum):
@@ -14,31 +20,32 @@ class SignalType(Enum):
     CLOSE_SHORT = "CLOSE_SHORT"
 
 
-@dataclass
+# Slotted: the backtest loop rewrites a single instance per candle
+@dataclass(slots=True)
 class MarketData:
     symbol: str
     timestamp: int  # unix ms
-    open: Decimal
-    high: Decimal
-    low: Decimal
-    close: Decimal
-    volume: Decimal
+    open: Number
+    high: Number
+    low: Number
+    close: Number
+    volume: Number
 
 
 @dataclass
 class Position:
     symbol: str
     side: str
-    quantity: Decimal
-    avg_entry_price: Decimal
+    quantity: Number
+    avg_entry_price: Number
 
 
 @dataclass
 class Signal:
     symbol: str
     signal_type: SignalType
-    quantity: Optional[Decimal] = None
-    price: Optional[Decimal] = None
+    quantity: Optional[Number] = None
+    price: Optional[Number] = None
     confidence: float = 1.0
     reason: str = ""
 
@@ -56,6 +63,10 @@ class StrategyMetadata:
 class Strategy(ABC):
     """Base class for all trading strategies."""
     
+    # Whether reset() clears all per-run state, so one instance can be reused
+    # across backtests (see backtest.runner._reuse_strategy)
+    resettable: ClassVar[bool] = False
+    
     @classmethod
     @abstractmethod
     def metadata(cls) -> StrategyMetadata:
@@ -83,3 +94,46 @@ class Strategy(ABC):
     def get_required_history(self) -> int:
         """Return number of candles needed before strategy can signal."""
         return 1
+    
+    def reset(self):
+        """
+        Optional: Clear per-run state (price history, circuit breaker, ...).
+        
+        Strategies that implement this and set resettable = True are
+        constructed once per parameter set and reused across backtests;
+        others get a fresh instance for every run.
+        """
+        pass
+    
+    def precompute(self, candles: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Optional: Vectorized signals for backtests.
+        
+        Args:
+            candles: Structured OHLCV array (backtest.runner.CANDLE_DTYPE)
+        
+        Returns:
+            (buy_mask, sell_mask) boolean arrays aligned with candles, or None
+            to have the backtest call on_data candle by candle
+        """
+        return None
+    
+    def exit_levels(self) -> Tuple[float, float]:
+        """
+        Optional: Take profit / stop loss applied alongside precompute's masks.
+        
+        Returns:
+            (take_profit_percent, stop_loss_percent) measured from the entry
+            fill; math.inf disables either exit
+        """
+        return math.inf, math.inf
+    
+    def trailing_stop_level(self) -> float:
+        """
+        Optional: Trailing stop applied alongside precompute's masks.
+        
+        Returns:
+            Exit once the close is this % below the highest high since entry
+            (entry bar included); math.inf disables it
+        """
+        return math.inf
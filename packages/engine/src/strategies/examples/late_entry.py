@@ -1,9 +1,11 @@
 """Late Entry Strategy - enters during favorable volatility with circuit breaker."""
 from decimal import Decimal
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from ..base import Strategy, StrategyMetadata, MarketData, Position, Signal, SignalType
 import math
 
+import numpy as np
+
 
 class LateEntryStrategy(Strategy):
     """
@@ -14,6 +16,8 @@ class LateEntryStrategy(Strategy):
     - Circuit breaker: stops after 3 consecutive losses, 24h cooldown
     """
     
+    resettable = True
+    
     @classmethod
     def metadata(cls) -> StrategyMetadata:
         return StrategyMetadata(
@@ -40,15 +44,23 @@ class LateEntryStrategy(Strategy):
         self.take_profit_percent = float(parameters.get("takeProfitPercent", 5.0))
         self.stop_loss_percent = float(parameters.get("stopLossPercent", 3.0))
         
+        self.lookback = 10  # candles needed for volatility calc
+        
+        self.reset()
+        
         # State from DB
-        self.state = state or {
+        if state:
+            self.state = state
+    
+    def reset(self):
+        """Clear price history and circuit breaker state."""
+        self.state = {
             "consecutive_losses": 0,
             "cooldown_until": None,
             "last_loss_at": None,
         }
         
         self.price_history: List[Decimal] = []
-        self.lookback = 10  # candles needed for volatility calc
     
     def get_required_history(self) -> int:
         return self.lookback + 1
@@ -84,7 +96,8 @@ class LateEntryStrategy(Strategy):
         """Calculate position size based on cap."""
         if price <= 0:
             return Decimal("0")
-        return self.position_cap_usd / price
+        # Backtests feed float candles, live trading feeds Decimal
+        return self.position_cap_usd / Decimal(str(price))
     
     def on_data(self, data: MarketData, positions: List[Position]) -> Optional[Signal]:
         """Process new data and potentially generate a signal."""
@@ -161,6 +174,44 @@ class LateEntryStrategy(Strategy):
             reason=f"Volatility {volatility*100:.2f}% > threshold {self.volatility_threshold*100:.1f}%, trending up"
         )
     
+    def precompute(self, candles: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vectorized entry mask for backtests, matching on_data bar for bar.
+        
+        Volatility and the 5-bar average are accumulated over shifted slices
+        in the same order as on_data's Python sums, so the comparisons see
+        identical floats. Exits are the take profit / stop loss levels.
+        """
+        # Circuit breaker / cooldown carried in from live state: let on_data handle it
+        if self.state.get("cooldown_until") or \
+                self.state.get("consecutive_losses", 0) >= self.max_consecutive_losses:
+            return None
+        
+        close = np.ascontiguousarray(candles["close"], dtype=np.float64)
+        n = len(close)
+        
+        # Volatility over the last `lookback` closes, 0 until there are enough
+        volatility = np.zeros(n)
+        k = self.lookback - 1  # returns per window
+        if n >= self.lookback:
+            returns = np.diff(close) / close[:-1]
+            m = n - k
+            windows = [returns[j:j + m] for j in range(k)]
+            mean = sum(windows) / k
+            volatility[k:] = np.sqrt(sum((w - mean) ** 2 for w in windows) / k)
+        
+        # Sum of the last 5 closes (fewer at the start), divided by 5 as in on_data
+        padded = np.concatenate((np.zeros(4), close))
+        recent_avg = sum(padded[j:j + n] for j in range(5)) / 5
+        
+        buy_mask = ~(volatility < self.volatility_threshold) & (close > recent_avg)
+        buy_mask[:2] = False
+        
+        return buy_mask, np.zeros(n, dtype=np.bool_)
+    
+    def exit_levels(self) -> Tuple[float, float]:
+        return self.take_profit_percent, self.stop_loss_percent
+    
     def on_position_close(self, pnl: Decimal):
         """Called when a position is closed with realized PnL."""
         if pnl < 0:
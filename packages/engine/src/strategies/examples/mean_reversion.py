@@ -1,14 +1,18 @@
 """Mean Reversion Strategy - trades bounces from Bollinger Bands."""
 from decimal import Decimal
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 import sys
 import os
 
+import numpy as np
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from strategies.base import Strategy, StrategyMetadata, MarketData, Position, Signal, SignalType
-from indicators.bollinger import calculate_bollinger_bands, mean_reversion_signal, is_squeeze
+from indicators.bollinger import (
+    calculate_bollinger_bands, calculate_bollinger_series, mean_reversion_signal, is_squeeze,
+)
 
 
 class MeanReversionStrategy(Strategy):
@@ -21,6 +25,8 @@ class MeanReversionStrategy(Strategy):
     - Quick profit targets (reversion to mean)
     """
     
+    resettable = True
+    
     @classmethod
     def metadata(cls) -> StrategyMetadata:
         return StrategyMetadata(
@@ -52,7 +58,14 @@ class MeanReversionStrategy(Strategy):
         self.max_consecutive_losses = int(parameters.get("maxConsecutiveLosses", 3))
         self.cooldown_hours = int(parameters.get("cooldownHours", 12))
         
-        self.state = state or {
+        self.reset()
+        
+        if state:
+            self.state = state
+    
+    def reset(self):
+        """Clear price history, entry tracking and circuit breaker state."""
+        self.state = {
             "consecutive_losses": 0,
             "cooldown_until": None,
             "last_loss_at": None,
@@ -78,7 +91,8 @@ class MeanReversionStrategy(Strategy):
     def _calculate_position_size(self, price: Decimal) -> Decimal:
         if price <= 0:
             return Decimal("0")
-        return self.position_cap_usd / price
+        # Backtests feed float candles, live trading feeds Decimal
+        return self.position_cap_usd / Decimal(str(price))
     
     def on_data(self, data: MarketData, positions: List[Position]) -> Optional[Signal]:
         # Update price history
@@ -179,6 +193,57 @@ class MeanReversionStrategy(Strategy):
         
         return None
     
+    def precompute(self, candles: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vectorized entry/exit masks for backtests.
+        
+        Bollinger Bands are computed for every bar at once (same rounding as
+        calculate_bollinger_bands), then the squeeze filter, lower-band entry
+        and middle-band exit are applied as array comparisons. Take profit /
+        stop loss come from exit_levels.
+        """
+        # Circuit breaker / cooldown carried in from live state: let on_data handle it
+        if self.state.get("cooldown_until") or \
+                self.state.get("consecutive_losses", 0) >= self.max_consecutive_losses:
+            return None
+        
+        close = np.ascontiguousarray(candles["close"], dtype=np.float64)
+        n = len(close)
+        period = self.bb_period
+        buy_mask = np.zeros(n, dtype=np.bool_)
+        sell_mask = np.zeros(n, dtype=np.bool_)
+        if n < period:
+            return buy_mask, sell_mask
+        
+        # Bands for every bar with a full window (bar i uses closes i-period+1..i)
+        upper, middle, lower, bandwidth = (
+            band[period - 1:]
+            for band in calculate_bollinger_series(close, period, self.bb_std_dev)
+        )
+        
+        upper = np.round(upper, 8)
+        middle = np.round(middle, 8)
+        lower = np.round(lower, 8)
+        bandwidth = np.round(bandwidth, 4)
+        price = close[period - 1:]
+        
+        # Entry: not in a squeeze, bandwidth wide enough, price in the bottom 20% of the band
+        entry = ~(bandwidth < float(self.min_band_width))
+        if self.min_band_width > 0:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                width = np.where(middle > 0, (upper - lower) / middle * 100, 0.0)
+            entry &= ~(width < float(self.min_band_width))
+        entry &= price <= lower + (middle - lower) * 0.2
+        buy_mask[period - 1:] = entry
+        
+        # Exit: reversion to within 2% of the middle band
+        sell_mask[period - 1:] = price >= middle * 0.98
+        
+        return buy_mask, sell_mask
+    
+    def exit_levels(self) -> Tuple[float, float]:
+        return self.take_profit_percent, self.stop_loss_percent
+    
     def on_position_close(self, pnl: Decimal):
         if pnl < 0:
             self.state["consecutive_losses"] = self.state.get("consecutive_losses", 0) + 1
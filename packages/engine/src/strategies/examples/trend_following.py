@@ -1,14 +1,17 @@
 """Trend Following Strategy - follows established trends with ADX filter."""
 from decimal import Decimal
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import sys
 import os
 
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from strategies.base import Strategy, StrategyMetadata, MarketData, Position, Signal, SignalType
-from indicators.adx import calculate_adx, get_trend_direction, is_trending
+from indicators.adx import calculate_adx, calculate_adx_windowed, get_trend_direction, is_trending
 
 
 class TrendFollowingStrategy(Strategy):
@@ -21,6 +24,8 @@ class TrendFollowingStrategy(Strategy):
     - Trailing stop for exits
     """
     
+    resettable = True
+    
     @classmethod
     def metadata(cls) -> StrategyMetadata:
         return StrategyMetadata(
@@ -48,7 +53,14 @@ class TrendFollowingStrategy(Strategy):
         self.max_consecutive_losses = int(parameters.get("maxConsecutiveLosses", 3))
         self.cooldown_hours = int(parameters.get("cooldownHours", 24))
         
-        self.state = state or {
+        self.reset()
+        
+        if state:
+            self.state = state
+    
+    def reset(self):
+        """Clear price history, trailing stop tracking and circuit breaker state."""
+        self.state = {
             "consecutive_losses": 0,
             "cooldown_until": None,
             "last_loss_at": None,
@@ -79,7 +91,8 @@ class TrendFollowingStrategy(Strategy):
     def _calculate_position_size(self, price: Decimal) -> Decimal:
         if price <= 0:
             return Decimal("0")
-        return self.position_cap_usd / price
+        # Backtests feed float candles, live trading feeds Decimal
+        return self.position_cap_usd / Decimal(str(price))
     
     def on_data(self, data: MarketData, positions: List[Position]) -> Optional[Signal]:
         # Update price history
@@ -129,7 +142,7 @@ class TrendFollowingStrategy(Strategy):
                 self.highest_since_entry = max(self.highest_since_entry, data.high)
             
             # Trailing stop
-            stop_price = self.highest_since_entry * Decimal(str(1 - self.trailing_stop_percent / 100))
+            stop_price = float(self.highest_since_entry) * (1 - self.trailing_stop_percent / 100)
             
             if data.close <= stop_price:
                 return Signal(
@@ -177,6 +190,58 @@ class TrendFollowingStrategy(Strategy):
         
         return None
     
+    def precompute(self, candles: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Vectorized entry/exit masks for backtests.
+        
+        ADX/DI are computed for every bar over the same bounded history
+        on_data keeps (same rounding as calculate_adx), then the bullish
+        breakout entry and bearish reversal exit are applied as array
+        comparisons. The trailing stop comes from trailing_stop_level.
+        """
+        # Circuit breaker / cooldown carried in from live state: let on_data handle it
+        if self.state.get("cooldown_until") or \
+                self.state.get("consecutive_losses", 0) >= self.max_consecutive_losses:
+            return None
+        
+        lookback = self.lookback_period
+        if lookback < 2:
+            return None  # on_data's breakout window would be empty
+        
+        high = np.ascontiguousarray(candles["high"], dtype=np.float64)
+        low = np.ascontiguousarray(candles["low"], dtype=np.float64)
+        close = np.ascontiguousarray(candles["close"], dtype=np.float64)
+        n = len(close)
+        buy_mask = np.zeros(n, dtype=np.bool_)
+        sell_mask = np.zeros(n, dtype=np.bool_)
+        
+        # on_data acts once it holds lookback + 10 bars, and keeps at most lookback + 20
+        start = lookback + 9
+        if n <= start:
+            return buy_mask, sell_mask
+        
+        adx, plus_di, minus_di = (
+            np.array([round(x, 2) for x in values.tolist()])
+            for values in calculate_adx_windowed(high, low, close, lookback + 20, period=14)
+        )
+        
+        # get_trend_direction / is_trending on the rounded values (NaN: no ADX yet, never trending)
+        trending = adx >= float(self.adx_threshold)
+        bullish = trending & (plus_di > minus_di)
+        bearish = trending & (minus_di > plus_di)
+        
+        # Breakout: close above the highest high of the previous lookback - 1 bars
+        recent_high = sliding_window_view(high, lookback - 1).max(axis=-1)
+        buy_mask[start:] = bullish[start:] & (close[start:] > recent_high[start - lookback + 1:n - lookback + 1])
+        
+        # Exit on a confirmed bearish trend
+        sell_mask[start:] = bearish[start:]
+        
+        return buy_mask, sell_mask
+    
+    def trailing_stop_level(self) -> float:
+        return self.trailing_stop_percent
+    
     def on_position_close(self, pnl: Decimal):
         if pnl < 0:
             self.state["consecutive_losses"] = self.state.get("consecutive_losses", 0) + 1
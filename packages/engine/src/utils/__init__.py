@@ -0,0 +1,6 @@
+# Utilities module
+from .jit import njit, prange, NUMBA_AVAILABLE
+from .rate_limit import TokenBucket
+from .cache import ttl_cache, TTLCache
+
+__all__ = ["njit", "prange", "NUMBA_AVAILABLE", "TokenBucket", "ttl_cache", "TTLCache"]
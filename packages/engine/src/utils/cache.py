@@ -0,0 +1,105 @@
+"""
+Time-based memoization.
+
+`ttl_cache` keeps each result for a fixed number of seconds, for slow-moving
+lookups (market and account lists) that hot loops would otherwise re-query
+on every tick. `TTLCache` is the same idea as a bounded key/value store, for
+callers that fill the cache themselves (e.g. per-token API responses).
+Cached values are shared between callers; treat them as read-only.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def ttl_cache(ttl: float, maxsize: Optional[int] = None) -> Callable:
+    """
+    Cache a function's results per argument tuple for `ttl` seconds.
+    
+    Expired entries are evicted on write; with `maxsize`, so are the oldest
+    ones beyond it. The wrapped function gains `cache_clear()` for
+    invalidating after writes.
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        lock = threading.Lock()
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            
+            with lock:
+                entry = entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+            
+            value = func(*args, **kwargs)
+            with lock:
+                entries[key] = (now + ttl, value)
+                entries.move_to_end(key)
+                
+                # Write order is expiry order: evict from the front
+                while entries:
+                    oldest_expiry = next(iter(entries.values()))[0]
+                    if (maxsize is None or len(entries) <= maxsize) and oldest_expiry > now:
+                        break
+                    entries.popitem(last=False)
+            return value
+        
+        def cache_clear():
+            with lock:
+                entries.clear()
+        
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    
+    return decorator
+
+
+class TTLCache:
+    """
+    Thread-safe mapping whose entries expire `ttl` seconds after being set.
+    
+    Holds at most `maxsize` entries. Entries are kept in write order, so
+    expired and surplus ones are always at the front and are evicted in
+    amortized O(1) on each write.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the live value for `key`, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._entries
+            entries[key] = (now + self.ttl, value)
+            entries.move_to_end(key)
+            
+            while entries:
+                oldest_expiry = next(iter(entries.values()))[0]
+                if len(entries) <= self.maxsize and oldest_expiry > now:
+                    break
+                entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,24 @@
+"""
+Optional Numba JIT support.
+
+Numba is an optional dependency. When it is not installed, `njit` becomes a
+no-op decorator and `prange` falls back to `range`, so decorated kernels still
+run as plain Python. Callers that have a vectorized NumPy alternative should
+check NUMBA_AVAILABLE and prefer that path over an interpreted loop.
+"""
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (supports bare and called forms)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        
+        def decorator(func):
+            return func
+        
+        return decorator
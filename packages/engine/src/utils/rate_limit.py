@@ -0,0 +1,47 @@
+"""
+Thread-safe token bucket rate limiter.
+
+Tokens refill continuously at `rate` per second up to `capacity`; each request
+takes one. Requests within the burst allowance go out immediately and only
+callers that find the bucket empty sleep, for just as long as the next token
+needs. Unlike a fixed delay between calls this lets concurrent requests
+overlap while still holding the long-run rate.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` requests/second with bursts of `capacity`."""
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+    
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (e.g. a server's Retry-After), then resume."""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            # In debt by `seconds` worth of refill: the next token is ready when the pause ends
+            self._tokens = min(tokens, 1 - seconds * self.rate)
+            self._updated = now
@@ -9,11 +9,12 @@ Event-driven multi-timeframe strategy runner.
 import os
 import sys
 import time
+import calendar
 import json
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 
 import psycopg2
@@ -28,7 +29,9 @@ from strategies import STRATEGY_REGISTRY
 from indicators.adx import calculate_adx, get_trend_direction
 from indicators.bollinger import calculate_bollinger_bands
 from indicators.rsi import calculate_rsi
-from data.candle_aggregator import aggregate_all_timeframes, get_bucket_start
+from data.candle_aggregator import (
+    TIMEFRAMES, backfill_candles, clear_stale_buckets, on_new_1m_candle, seed_open_buckets,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -57,6 +60,12 @@ BINANCE_SYMBOL_MAP = {
     "ETH-USD": "ETHUSDT",
 }
 
+# (timeframe, minutes) pairs, flattened once for the per-candle loop
+TIMEFRAME_MINUTES = tuple((tf, config["minutes"]) for tf, config in TIMEFRAMES.items())
+
+# Last bucket index seen per (market_id, timeframe), see crossed_timeframes
+_last_bucket: Dict[Tuple[str, str], int] = {}
+
 # Strategy to interval mapping
 STRATEGY_INTERVALS = {
     "late-entry-v1": "1m",
@@ -123,7 +132,7 @@ def fetch_binance_price(symbol: str) -> Optional[Decimal]:
             
             resp.raise_for_status()
             data = resp.json()
-            return Decimal(str(data["price"]))
+            return Decimal(data["price"])
             
         except requests.exceptions.Timeout:
             logger.warning(f"Binance timeout (attempt {attempt + 1})")
@@ -256,14 +265,52 @@ def insert_1m_candle(market_id: str, symbol: str) -> tuple:
             return candle_time, True
 
 
-def aggregate_timeframes(market_id: str):
-    """Aggregate 1m candles into higher timeframes."""
-    results = aggregate_all_timeframes(DATABASE_URL, market_id)
+def catch_up_timeframes(market_id: str, now: datetime):
+    """Aggregate closed buckets missed while stopped and seed the open ones (on startup)."""
+    # Leftover running aggregates must not overwrite the backfilled candles
+    clear_stale_buckets(DATABASE_URL, market_id, now)
+    for timeframe, _ in TIMEFRAME_MINUTES:
+        count = backfill_candles(DATABASE_URL, market_id, timeframe)
+        if count > 0:
+            logger.info(f"Caught up {count} {timeframe} candles for market {market_id}")
+    seed_open_buckets(DATABASE_URL, market_id, now)
+
+
+def aggregate_timeframes(market_id: str, completed_time: datetime):
+    """Fold the 1m candle that just closed into the higher timeframes."""
+    results = on_new_1m_candle(DATABASE_URL, market_id, completed_time)
     for tf, count in results.items():
         if count > 0:
             logger.info(f"Aggregated {count} {tf} candles")
 
 
+def crossed_timeframes(market_id: str, candle_time: datetime) -> List[Tuple[str, datetime]]:
+    """
+    Higher timeframes whose bucket changed with this 1m candle.
+    
+    Compares bucket indices (epoch minute // interval) with the last ones
+    seen for the market, so a boundary is caught even when the candles
+    around it are missing (a minute % interval check misses it, and never
+    fires for 4h past the first hour). The first candle seen counts as a
+    crossing.
+    
+    Returns:
+        (timeframe, start of the new bucket) pairs
+    """
+    epoch_min = calendar.timegm(candle_time.utctimetuple()) // 60
+    crossed = []
+    
+    for timeframe, interval_minutes in TIMEFRAME_MINUTES:
+        bucket = epoch_min // interval_minutes
+        key = (market_id, timeframe)
+        
+        if _last_bucket.get(key) != bucket:
+            _last_bucket[key] = bucket
+            crossed.append((timeframe, datetime.utcfromtimestamp(bucket * interval_minutes * 60)))
+    
+    return crossed
+
+
 def get_candle_history(market_id: str, interval: str, limit: int = 50) -> List[MarketData]:
     """Get historical candles for a specific interval."""
     with get_db_connection() as conn:
@@ -282,11 +329,11 @@ def get_candle_history(market_id: str, interval: str, limit: int = 50) -> List[M
                 MarketData(
                     symbol="",
                     timestamp=int(r["timestamp"].timestamp() * 1000),
-                    open=Decimal(str(r["open"])),
-                    high=Decimal(str(r["high"])),
-                    low=Decimal(str(r["low"])),
-                    close=Decimal(str(r["close"])),
-                    volume=Decimal(str(r["volume"]))
+                    open=r["open"],
+                    high=r["high"],
+                    low=r["low"],
+                    close=r["close"],
+                    volume=r["volume"]
                 )
                 for r in rows
             ]
@@ -392,14 +439,14 @@ def get_open_positions(account_id: str, market_id: str = None) -> List[Position]
         with conn.cursor() as cur:
             if market_id:
                 cur.execute("""
-                    SELECT p.*, m.symbol 
+                    SELECT p.side, p.quantity, p.avg_entry_price, m.symbol
                     FROM positions p
                     JOIN markets m ON p.market_id = m.id
                     WHERE p.account_id = %s AND p.market_id = %s AND p.is_open = true
                 """, (account_id, market_id))
             else:
                 cur.execute("""
-                    SELECT p.*, m.symbol 
+                    SELECT p.side, p.quantity, p.avg_entry_price, m.symbol
                     FROM positions p
                     JOIN markets m ON p.market_id = m.id
                     WHERE p.account_id = %s AND p.is_open = true
@@ -409,8 +456,8 @@ def get_open_positions(account_id: str, market_id: str = None) -> List[Position]
                 Position(
                     symbol=row["symbol"],
                     side=row["side"],
-                    quantity=Decimal(str(row["quantity"])),
-                    avg_entry_price=Decimal(str(row["avg_entry_price"]))
+                    quantity=row["quantity"],
+                    avg_entry_price=row["avg_entry_price"]
                 )
                 for row in cur.fetchall()
             ]
@@ -421,7 +468,9 @@ def get_strategy_state(instance_id: str) -> Dict[str, Any]:
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT * FROM strategy_state
+                SELECT consecutive_losses, last_loss_at, cooldown_until, total_trades,
+                       winning_trades, total_losses, total_pnl, max_drawdown
+                FROM strategy_state
                 WHERE strategy_instance_id = %s
             """, (instance_id,))
             row = cur.fetchone()
@@ -491,7 +540,7 @@ def execute_paper_order(account_id: str, market_id: str, signal: Signal,
                     
                     cur.execute("SELECT current_balance FROM accounts WHERE id = %s", (account_id,))
                     balance_row = cur.fetchone()
-                    if not balance_row or Decimal(str(balance_row["current_balance"])) < cost:
+                    if not balance_row or balance_row["current_balance"] < cost:
                         logger.warning(f"Insufficient balance")
                         return False
                     
@@ -545,8 +594,8 @@ def execute_paper_order(account_id: str, market_id: str, signal: Signal,
                         return False
                     
                     position_id = str(pos_row["id"])
-                    entry_price = Decimal(str(pos_row["avg_entry_price"]))
-                    quantity = Decimal(str(pos_row["quantity"]))
+                    entry_price = pos_row["avg_entry_price"]
+                    quantity = pos_row["quantity"]
                     
                     proceeds = quantity * current_price
                     pnl = proceeds - (quantity * entry_price)
@@ -813,6 +862,11 @@ def run_event_driven_loop():
     instances = ensure_strategy_instances(account_id)
     logger.info(f"Strategies: {[(i.strategy_id, i.interval) for i in instances]}")
     
+    # Bring higher timeframes up to date before folding candles incrementally
+    startup_minute = datetime.utcnow().replace(second=0, microsecond=0)
+    for market_id in markets.values():
+        catch_up_timeframes(market_id, startup_minute)
+    
     # Track last processed candle per market
     last_candles: Dict[str, datetime] = {}
     
@@ -832,27 +886,18 @@ def run_event_driven_loop():
                 
                 # If new 1m candle, aggregate and compute indicators
                 if is_new:
-                    # Aggregate to higher timeframes
-                    aggregate_timeframes(market_id)
+                    # The previously inserted candle is final now: fold it into
+                    # the higher timeframes (none yet on the first pass)
+                    previous_time = last_candles.get(market_id)
+                    if previous_time is not None:
+                        aggregate_timeframes(market_id, previous_time)
                     
                     # Compute 1m indicators
                     compute_and_save_indicators(market_id, "1m", candle_time)
                     
-                    # Check if we completed higher timeframe buckets
-                    if candle_time.minute == 0:
-                        # Completed 1h bucket
-                        compute_and_save_indicators(market_id, "1h", 
-                            candle_time.replace(minute=0, second=0))
-                    
-                    if candle_time.minute % 15 == 0:
-                        # Completed 15m bucket
-                        compute_and_save_indicators(market_id, "15m",
-                            candle_time.replace(minute=(candle_time.minute // 15) * 15, second=0))
-                    
-                    if candle_time.minute % 240 == 0:
-                        # Completed 4h bucket
-                        bucket_start = get_bucket_start(candle_time, 240)
-                        compute_and_save_indicators(market_id, "4h", bucket_start)
+                    # Higher timeframe indicators once their bucket has rolled over
+                    for timeframe, bucket_start in crossed_timeframes(market_id, candle_time):
+                        compute_and_save_indicators(market_id, timeframe, bucket_start)
                 
                 last_candles[market_id] = candle_time
                 
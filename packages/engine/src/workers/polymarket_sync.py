@@ -9,12 +9,12 @@ Periodically syncs Polymarket markets and prices.
 import os
 import sys
 import time
-import json
 import logging
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, Any, List, Optional
 
+import orjson
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
@@ -98,7 +98,7 @@ def upsert_market(market_info: Dict) -> Optional[str]:
                         updated_at = NOW()
                     WHERE id = %s
                     RETURNING id
-                """, (json.dumps(metadata), market_info.get("active", True), existing["id"]))
+                """, (orjson.dumps(metadata).decode(), market_info.get("active", True), existing["id"]))
                 conn.commit()
                 return str(existing["id"])
             else:
@@ -110,7 +110,7 @@ def upsert_market(market_info: Dict) -> Optional[str]:
                 """, (
                     symbol,
                     market_info.get("question", symbol)[:200],
-                    json.dumps(metadata),
+                    orjson.dumps(metadata).decode(),
                     market_info.get("active", True)
                 ))
                 row = cur.fetchone()